@@ -1,13 +1,20 @@
 # app.py (Tích hợp hoàn chỉnh)
 
 import os
+import time
 import shutil
-import glob
-from flask import Flask, Response, render_template, jsonify, request, abort
+from flask import Flask, Response, render_template, jsonify, request, abort, g, send_file
 import json
-from functools import lru_cache
-from scraper import InstagramScraper, ThreadsScraper, FacebookScraper
-from PIL import Image
+import atexit
+import hashlib
+import importlib
+from urllib.parse import quote
+from scraper.pool import ScraperPool
+from scraper.metrics import REGISTRY
+from jobs import JobStore, JobScheduler
+from thumbnails import ThumbnailService
+from listing import ListingCache
+from tree_index import TreeIndex
 
 app = Flask(__name__)
 app.secret_key = 'a_very_secret_key_please_change_me'
@@ -16,11 +23,59 @@ app.secret_key = 'a_very_secret_key_please_change_me'
 BASE_DIR = os.path.realpath("CloudStorage")
 THUMBNAIL_DIR = os.path.realpath(os.path.join('static', 'thumbnails'))
 THUMBNAIL_SIZE = (150, 150)
+THUMBNAIL_PLACEHOLDER = '/static/thumbnail_placeholder.svg'
+CONTENT_PAGE_SIZE = 200
+CONTENT_MAX_PAGE_SIZE = 1000
 ALLOWED_EXTENSIONS = {'png', 'jpg', 'jpeg', 'gif', 'bmp'}
+# Ảnh gốc và các bản thu nhỏ để xem (/media/<path>?w=600), lưu đệm trên đĩa.
+MEDIA_CACHE_DIR = os.path.realpath('media_cache')
+MEDIA_VARIANT_WIDTHS = (600, 1200)
+MEDIA_MAX_AGE = 365 * 24 * 3600  # giây, cho URL có phiên bản (?v=...)
+MEDIA_RENDER_TIMEOUT = 30  # giây chờ tạo một bản thu nhỏ
+# Tiến trình con của process pool thumbnail (spawn) nạp lại tệp chạy chính dưới tên __mp_main__.
+# Ở đó chỉ cần generate_thumbnail: không tạo pool trình duyệt, hàng đợi hay dịch vụ nền nào.
+IS_WORKER_PROCESS = __name__ == '__mp_main__'
+# ENABLE_SCRAPING=0: chỉ phục vụ thư viện ảnh/gán nhãn, không nạp selenium-wire và không chạy hàng đợi.
+ENABLE_SCRAPING = os.environ.get('ENABLE_SCRAPING', '1') != '0'
+# Lớp trình cào của mỗi nền tảng, chỉ được import khi cần trình duyệt đầu tiên.
+SCRAPER_CLASSES = {'instagram': 'InstagramScraper', 'threads': 'ThreadsScraper', 'facebook': 'FacebookScraper'}
+# Pool trình duyệt cho mỗi nền tảng
+POOL_MIN_SIZE = 0
+POOL_MAX_SIZE = 2
+POOL_IDLE_TIMEOUT = 600  # giây
+POOL_LEASE_TIMEOUT = 120  # giây
+# Chặn ảnh/video/font trong trình duyệt cào (đặt False để gỡ lỗi giao diện trang).
+SCRAPER_BLOCK_RESOURCES = True
+# Hồ sơ Chrome bền vững cho mỗi nền tảng (cookie và bộ nhớ đệm giữ lại giữa các lần chạy); None = hồ sơ tạm.
+SCRAPER_PROFILE_ROOT = os.path.realpath('browser_profiles')
+# Hàng đợi công việc chạy nền
+JOBS_DB = os.path.realpath("jobs.sqlite")
+JOB_CONCURRENCY = {'instagram': 2, 'threads': 2, 'facebook': 1}
 
 os.makedirs(BASE_DIR, exist_ok=True)
 os.makedirs(THUMBNAIL_DIR, exist_ok=True)
 
+def _create_scraper(platform):
+    scraper_cls = getattr(importlib.import_module('scraper'), SCRAPER_CLASSES[platform])
+    return scraper_cls(headless=True, working_dir=BASE_DIR, block_resources=SCRAPER_BLOCK_RESOURCES,
+                       profile_root=SCRAPER_PROFILE_ROOT)
+
+def _make_pool(platform):
+    return ScraperPool(
+        lambda: _create_scraper(platform),
+        min_size=POOL_MIN_SIZE, idle_timeout=POOL_IDLE_TIMEOUT,
+        # Đủ trình duyệt cho các công việc nền cộng thêm các lần cào trực tiếp.
+        max_size=POOL_MAX_SIZE + JOB_CONCURRENCY.get(platform, 1),
+    )
+
+SCRAPER_POOLS = ({platform: _make_pool(platform) for platform in SCRAPER_CLASSES}
+                 if ENABLE_SCRAPING and not IS_WORKER_PROCESS else {})
+
+@atexit.register
+def _close_scraper_pools():
+    for pool in SCRAPER_POOLS.values():
+        pool.close()
+
 # --- Helper Functions ---
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
@@ -35,25 +90,75 @@ def get_safe_path(path_str=""):
         abort(404, "Đường dẫn không tồn tại.")
     return full_path
 
+THUMBNAILS = ThumbnailService(BASE_DIR, THUMBNAIL_DIR, THUMBNAIL_SIZE, '/static/thumbnails')
+atexit.register(THUMBNAILS.shutdown)
+
 def create_thumbnail(image_full_path):
-    rel_path = os.path.relpath(image_full_path, BASE_DIR)
-    safe_name = rel_path.replace(os.sep, '_')
-    thumb_path = os.path.join(THUMBNAIL_DIR, safe_name)
-    if not os.path.exists(thumb_path):
-        try:
-            with Image.open(image_full_path) as img:
-                img.thumbnail(THUMBNAIL_SIZE)
-                img.save(thumb_path)
-        except Exception as e:
-            print(f"Lỗi tạo thumbnail cho {image_full_path}: {e}")
-            return None
-    return f"/static/thumbnails/{safe_name}"
+    """Trả về (url, pending) của thumbnail; không bao giờ giải mã ảnh trong luồng request."""
+    return THUMBNAILS.lookup(image_full_path)
+
+# Các bản thu nhỏ dùng chung process pool với thumbnail; được phục vụ qua /media/<path>?w=<width>
+# (render()), nên không có tiền tố URL riêng.
+MEDIA_VARIANTS = {
+    width: ThumbnailService(BASE_DIR, os.path.join(MEDIA_CACHE_DIR, str(width)), (width, None), pool=THUMBNAILS)
+    for width in MEDIA_VARIANT_WIDTHS
+}
+
+def move_thumbnail(old_rel_path, new_rel_path):
+    """Chuyển thumbnail và các bản thu nhỏ theo ảnh đã được đổi chỗ."""
+    THUMBNAILS.move(old_rel_path, new_rel_path)
+    for variants in MEDIA_VARIANTS.values():
+        variants.move(old_rel_path, new_rel_path)
+
+def media_version(stat):
+    """Phiên bản của một ảnh gốc (đổi khi kích thước hoặc mtime thay đổi), dùng cho ETag và ?v=."""
+    return f"{stat.st_size:x}-{stat.st_mtime_ns:x}"
+
+def media_url(rel_path, stat):
+    return f"/media/{quote(rel_path)}?v={media_version(stat)}"
+
+LISTINGS = ListingCache()
+TREE = TreeIndex(BASE_DIR)
+
+def _on_scrape_finished(platform, username):
+    """Làm mới các bộ đệm bị ảnh hưởng và tạo sẵn thumbnail sau khi cào xong một người dùng."""
+    user_folder = os.path.realpath(os.path.join(BASE_DIR, platform, username))
+    if not user_folder.startswith(BASE_DIR):
+        return
+    platform_folder = os.path.join(BASE_DIR, platform)
+    LISTINGS.invalidate(BASE_DIR, platform_folder, user_folder)
+    TREE.invalidate(BASE_DIR, platform_folder, user_folder)
+    THUMBNAILS.warm(user_folder, accept=allowed_file)
+
+def _on_job_finished(job):
+    _on_scrape_finished(job['platform'], job['username'])
+
+JOB_SCHEDULER = (JobScheduler(JobStore(JOBS_DB), SCRAPER_POOLS, JOB_CONCURRENCY, on_finish=_on_job_finished)
+                 if not IS_WORKER_PROCESS else None)
+
+# --- Metrics ---
+REQUEST_LATENCY = REGISTRY.histogram(
+    'http_request_duration_seconds', 'Thời gian xử lý các API thư viện ảnh.', ('endpoint',))
+TIMED_ENDPOINTS = {'api_content', 'api_thumbnails'}
+REGISTRY.gauge('scraper_drivers', 'Số trình duyệt cào theo trạng thái.', ('platform', 'state')).set_function(
+    lambda: {(platform, state): value
+             for platform, pool in SCRAPER_POOLS.items()
+             for state, value in pool.stats().items()})
+
+@app.before_request
+def _start_request_timer():
+    g.request_started = time.perf_counter()
 
-def remove_thumbnail(image_rel_path):
-    safe_name = image_rel_path.replace('/', '_').replace('\\', '_')
-    thumb_path = os.path.join(THUMBNAIL_DIR, safe_name)
-    if os.path.exists(thumb_path):
-        os.remove(thumb_path)
+@app.after_request
+def _observe_request_latency(response):
+    if request.endpoint in TIMED_ENDPOINTS:
+        REQUEST_LATENCY.observe(time.perf_counter() - g.request_started, endpoint=request.endpoint)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    """Số liệu theo định dạng văn bản của Prometheus."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 # --- Main Route ---
 @app.route('/')
@@ -67,57 +172,74 @@ def scrape_stream():
     username = request.args.get('username', '').strip()
     if not platform or not username:
         return Response("Missing parameters", status=400)
+    if not ENABLE_SCRAPING:
+        error_event = json.dumps({"type": "error", "data": {"message": "Máy chủ này không bật chức năng cào dữ liệu."}})
+        return Response(f"data: {error_event}\n\n", mimetype='text/event-stream')
+    # mode=api: chỉ dùng trình duyệt để khởi tạo phiên, các trang còn lại lấy qua GraphQL
+    api_replay = request.args.get('mode') == 'api'
+    # incremental=1: dừng khi gặp trang chỉ gồm các media đã tải
+    incremental = request.args.get('incremental') == '1'
 
     def generate_events():
-        scraper = None
+        pool = SCRAPER_POOLS.get(platform)
+        if pool is None:
+            error_event = json.dumps({"type": "error", "data": {"message": "Nền tảng không hợp lệ."}})
+            yield f"data: {error_event}\n\n"
+            return
         try:
-            scraper_map = {
-                'instagram': InstagramScraper,
-                'threads': ThreadsScraper,
-                'facebook': FacebookScraper
-            }
-            if platform in scraper_map:
-                scraper = scraper_map[platform](headless=True, working_dir=BASE_DIR)
-            else:
-                error_event = json.dumps({"type": "error", "data": {"message": "Nền tảng không hợp lệ."}})
-                yield f"data: {error_event}\n\n"
-                return
-
-            for event_data in scraper.scrape_users([username]):
-                yield f"data: {event_data}\n\n"
+            with pool.lease(timeout=POOL_LEASE_TIMEOUT) as scraper:
+                for event_data in scraper.scrape_users([username], api_replay=api_replay, incremental=incremental):
+                    yield f"data: {event_data}\n\n"
             
-            api_tree.cache_clear()
+            _on_scrape_finished(platform, username)
         except Exception as e:
             error_event = json.dumps({"type": "error", "data": {"message": str(e)}})
             yield f"data: {error_event}\n\n"
-        finally:
-            if scraper:
-                scraper.close()
     return Response(generate_events(), mimetype='text/event-stream')
 
 # --- API Routes ---
 @app.route('/api/tree')
-@lru_cache(maxsize=1)
 def api_tree():
-    def build_tree(path):
-        items = []
-        try:
-            for item in sorted(os.listdir(path)):
-                item_path = os.path.join(path, item)
-                if os.path.isdir(item_path):
-                    rel_path = os.path.relpath(item_path, BASE_DIR).replace('\\', '/')
-                    items.append({'name': item, 'path': rel_path, 'children': build_tree(item_path)})
-        except Exception:
-            return []
-        return items
-    return jsonify([{'name': 'CloudStorage', 'path': '', 'children': build_tree(BASE_DIR), 'isRoot': True}])
+    """
+    Cây thư mục nhãn. Tham số: path (mặc định là gốc) và depth (số cấp mở rộng,
+    bỏ trống = toàn bộ). Hỗ trợ ETag để trình duyệt nhận 304 khi cây không đổi.
+    """
+    rel_path = request.args.get('path', '')
+    depth = request.args.get('depth', type=int)
+    node = TREE.node(get_safe_path(rel_path), depth)
+    if not rel_path:
+        node.update({'name': 'CloudStorage', 'isRoot': True})
+    response = jsonify([node])
+    response.set_etag(hashlib.sha1(response.get_data()).hexdigest())
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
 
 @app.route('/api/content')
 def api_content():
+    """
+    Liệt kê một trang ảnh của thư mục. Tham số: path, limit, cursor (lấy từ nextCursor
+    của trang trước) và sort ('name' hoặc 'date').
+    """
     current_dir = get_safe_path(request.args.get('path', ''))
-    image_files = sorted([f for f in glob.glob(os.path.join(current_dir, "*")) if os.path.isfile(f) and allowed_file(f)], key=os.path.basename)
-    images = [{'path': os.path.relpath(p, BASE_DIR).replace('\\', '/'), 'name': os.path.basename(p), 'thumbnail': create_thumbnail(p)} for p in image_files if create_thumbnail(p)]
-    subfolders = sorted([{'name': d, 'path': os.path.relpath(os.path.join(current_dir, d), BASE_DIR).replace('\\', '/')} for d in os.listdir(current_dir) if os.path.isdir(os.path.join(current_dir, d))], key=lambda x: x['name'])
+    sort = request.args.get('sort', 'name')
+    if sort not in ('name', 'date'):
+        return jsonify({'error': 'Kiểu sắp xếp không hợp lệ.'}), 400
+    limit = min(max(request.args.get('limit', CONTENT_PAGE_SIZE, type=int), 1), CONTENT_MAX_PAGE_SIZE)
+    listing = LISTINGS.get(current_dir, accept=allowed_file)
+    try:
+        entries, next_cursor = listing.page(sort, request.args.get('cursor'), limit)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    images = []
+    for entry in entries:
+        full_path = os.path.join(current_dir, entry.name)
+        thumbnail, pending = THUMBNAILS.lookup(full_path, stat=entry)
+        if thumbnail or pending:
+            rel_file = os.path.relpath(full_path, BASE_DIR).replace('\\', '/')
+            images.append({'path': rel_file, 'name': entry.name, 'media': media_url(rel_file, entry),
+                           'thumbnail': thumbnail or THUMBNAIL_PLACEHOLDER, 'pending': pending})
+    subfolders = [{'name': d, 'path': os.path.relpath(os.path.join(current_dir, d), BASE_DIR).replace('\\', '/')} for d in listing.dirs]
     
     rel_path = os.path.relpath(current_dir, BASE_DIR) if current_dir != BASE_DIR else ""
     breadcrumbs = []
@@ -126,7 +248,49 @@ def api_content():
         for i, part in enumerate(parts):
             breadcrumbs.append({'name': part, 'path': '/'.join(parts[:i+1])})
 
-    return jsonify({'images': images, 'labels': subfolders, 'breadcrumbs': breadcrumbs})
+    return jsonify({'images': images, 'labels': subfolders, 'breadcrumbs': breadcrumbs,
+                    'nextCursor': next_cursor, 'total': len(listing.files)})
+
+@app.route('/api/thumbnails', methods=['POST'])
+def api_thumbnails():
+    """Trả về URL thumbnail đã sẵn sàng cho các ảnh đang chờ (dùng để thay placeholder)."""
+    ready = {}
+    for rel_path in (request.json or {}).get('paths', []):
+        full_path = get_safe_path(rel_path)
+        thumbnail, _ = create_thumbnail(full_path)
+        if thumbnail:
+            ready[rel_path] = thumbnail
+    return jsonify({'thumbnails': ready})
+
+@app.route('/media/<path:rel_path>')
+def media(rel_path):
+    """
+    Phục vụ ảnh gốc hoặc bản thu nhỏ (tham số w, một trong MEDIA_VARIANT_WIDTHS).
+    Hỗ trợ ETag/Last-Modified (304) và Range; URL có ?v= khớp phiên bản hiện tại được
+    lưu đệm lâu dài, còn lại trình duyệt phải xác thực lại bằng ETag.
+    """
+    full_path = get_safe_path(rel_path)
+    if not os.path.isfile(full_path) or not allowed_file(full_path):
+        abort(404, "Không tìm thấy ảnh.")
+    stat = os.stat(full_path)
+    version = media_version(stat)
+    file_path = full_path
+    width = request.args.get('w', type=int)
+    if width is not None:
+        if width not in MEDIA_VARIANTS:
+            abort(400, f"Kích thước không hợp lệ (cho phép: {', '.join(map(str, MEDIA_VARIANT_WIDTHS))}).")
+        # Ảnh không thu nhỏ được (ví dụ lỗi giải mã) thì trả về ảnh gốc.
+        file_path = MEDIA_VARIANTS[width].render(full_path, stat, MEDIA_RENDER_TIMEOUT) or full_path
+        if file_path != full_path:
+            version = f"{version}-w{width}"
+    # send_file dùng wsgi.file_wrapper (sendfile) khi máy chủ hỗ trợ, hoặc X-Sendfile nếu bật USE_X_SENDFILE.
+    response = send_file(file_path, conditional=True, etag=version, last_modified=stat.st_mtime,
+                         max_age=MEDIA_MAX_AGE if request.args.get('v') == media_version(stat) else None)
+    if request.args.get('v') == media_version(stat):
+        response.cache_control.immutable = True
+    else:
+        response.cache_control.no_cache = True
+    return response
 
 @app.route('/api/create_label', methods=['POST'])
 def create_label():
@@ -139,33 +303,115 @@ def create_label():
     if os.path.exists(new_folder):
         return jsonify({'error': f'Nhãn "{label_name}" đã tồn tại.'}), 409
     os.makedirs(new_folder)
-    api_tree.cache_clear()
+    LISTINGS.invalidate(parent_path)
+    TREE.invalidate(parent_path)
     return jsonify({'message': f'Nhãn "{label_name}" đã được tạo.'})
 
+def _plan_moves(file_rel_paths, dest_full_path):
+    """
+    Kiểm tra cả lô một lần trước khi di chuyển. Trả về (các cặp (nguồn, đích) hợp lệ,
+    kết quả lỗi theo từng tệp).
+    """
+    moves, failures = [], []
+    taken = set()
+    for rel_path in file_rel_paths:
+        src_full_path = os.path.realpath(os.path.join(BASE_DIR, rel_path))
+        name = os.path.basename(src_full_path)
+        dest_file = os.path.join(dest_full_path, name)
+        if not src_full_path.startswith(BASE_DIR + os.sep) or not allowed_file(name):
+            error = "Đường dẫn không hợp lệ."
+        elif not os.path.isfile(src_full_path):
+            error = "Tệp không tồn tại."
+        elif os.path.dirname(src_full_path) == dest_full_path:
+            error = "Tệp đã nằm trong nhãn này."
+        elif dest_file in taken or os.path.exists(dest_file):
+            error = f"File '{name}' đã tồn tại ở thư mục đích."
+        else:
+            taken.add(dest_file)
+            moves.append((rel_path, src_full_path, dest_file))
+            continue
+        failures.append({'path': rel_path, 'error': error})
+    return moves, failures
+
 @app.route('/api/assign_label', methods=['POST'])
 def assign_label():
+    """
+    Di chuyển một lô ảnh vào một nhãn. Cả lô được kiểm tra trước, tệp được đổi chỗ bằng
+    os.rename (cùng hệ thống tệp) và thumbnail được chuyển theo thay vì tạo lại.
+    Trả về kết quả từng tệp trong 'results' ({'path', 'newPath'} hoặc {'path', 'error'}).
+    """
     data = request.json
     file_rel_paths = data.get('files', [])
-    dest_rel_path = data.get('labelPath', '')
-    dest_full_path = get_safe_path(dest_rel_path)
+    dest_full_path = get_safe_path(data.get('labelPath', ''))
     if not os.path.isdir(dest_full_path):
         return jsonify({'error': 'Thư mục đích không hợp lệ.'}), 400
+    moves, results = _plan_moves(file_rel_paths, dest_full_path)
+    changed_dirs = set()
     moved_count = 0
-    errors = []
-    for rel_path in file_rel_paths:
+    for rel_path, src_full_path, dest_file in moves:
         try:
-            src_full_path = get_safe_path(rel_path)
-            dest_file = os.path.join(dest_full_path, os.path.basename(src_full_path))
-            if os.path.exists(dest_file):
-                errors.append(f"File '{os.path.basename(rel_path)}' đã tồn tại ở thư mục đích.")
-                continue
-            shutil.move(src_full_path, dest_file)
-            remove_thumbnail(rel_path)
-            moved_count += 1
-        except Exception as e:
-            errors.append(f"Lỗi di chuyển {rel_path}: {e}")
-    api_tree.cache_clear()
-    return jsonify({'moved': moved_count, 'errors': errors})
+            try:
+                os.rename(src_full_path, dest_file)
+            except OSError:
+                # Khác hệ thống tệp (ví dụ thư mục được mount riêng): sao chép rồi xóa.
+                shutil.move(src_full_path, dest_file)
+        except OSError as e:
+            results.append({'path': rel_path, 'error': f"Lỗi di chuyển: {e}"})
+            continue
+        new_rel_path = os.path.relpath(dest_file, BASE_DIR).replace('\\', '/')
+        move_thumbnail(os.path.relpath(src_full_path, BASE_DIR), new_rel_path)
+        changed_dirs.add(os.path.dirname(src_full_path))
+        results.append({'path': rel_path, 'newPath': new_rel_path})
+        moved_count += 1
+    # Chỉ tệp bị di chuyển nên cây thư mục không đổi; chỉ làm mới danh sách tệp.
+    if moved_count:
+        LISTINGS.invalidate(dest_full_path, *changed_dirs)
+    errors = [f"{result['path']}: {result['error']}" for result in results if 'error' in result]
+    return jsonify({'moved': moved_count, 'errors': errors, 'results': results})
+
+# --- Background Job Routes ---
+@app.route('/api/jobs', methods=['POST'])
+def submit_jobs():
+    """
+    Thêm một hoặc nhiều công việc vào hàng đợi.
+    Nhận {"platform", "username"} hoặc {"jobs": [{"platform", "username"}, ...]},
+    tùy chọn "mode": "api" và "incremental": true.
+    """
+    if not ENABLE_SCRAPING:
+        return jsonify({'error': 'Máy chủ này không bật chức năng cào dữ liệu.'}), 503
+    data = request.json or {}
+    entries = data.get('jobs') or [data]
+    options = {'api_replay': data.get('mode') == 'api', 'incremental': bool(data.get('incremental'))}
+    job_ids = []
+    errors = []
+    for entry in entries:
+        platform = (entry.get('platform') or '').strip()
+        username = (entry.get('username') or '').strip()
+        if platform not in SCRAPER_POOLS or not username:
+            errors.append(f"Công việc không hợp lệ: {platform}:{username}")
+            continue
+        job_ids.append(JOB_SCHEDULER.submit(platform, username, options))
+    status = 202 if job_ids else 400
+    return jsonify({'jobs': job_ids, 'errors': errors}), status
+
+@app.route('/api/jobs')
+def list_jobs():
+    status = request.args.get('status')
+    limit = request.args.get('limit', 200, type=int)
+    return jsonify({'jobs': JOB_SCHEDULER.store.list(status=status, limit=limit), 'running': JOB_SCHEDULER.stats()})
+
+@app.route('/api/jobs/<int:job_id>')
+def get_job(job_id):
+    job = JOB_SCHEDULER.store.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Không tìm thấy công việc.'}), 404
+    return jsonify(job)
+
+@app.route('/api/jobs/<int:job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if not JOB_SCHEDULER.store.cancel(job_id):
+        return jsonify({'error': 'Chỉ có thể hủy công việc đang chờ.'}), 409
+    return jsonify({'message': 'Đã hủy công việc.'})
 
 @app.route('/api/check_user_exists')
 def check_user_exists():
@@ -178,5 +424,8 @@ def check_user_exists():
     user_folder = os.path.join(BASE_DIR, platform, username)
     return jsonify({'exists': os.path.exists(user_folder)})
 
+if ENABLE_SCRAPING and not IS_WORKER_PROCESS:
+    JOB_SCHEDULER.start()
+
 if __name__ == '__main__':
     app.run(host='127.0.0.1', port=5000, debug=False)
\ No newline at end of file
@@ -0,0 +1,214 @@
+"""
+Bộ đo hiệu năng ngoại tuyến cho các đường xử lý nóng của trình cào.
+
+    python -m benchmarks run [--platform instagram] [--fixtures threads=threads.jsonl] [--json kq.jsonl]
+    python -m benchmarks record instagram <tên người dùng> instagram.jsonl
+    python -m benchmarks startup
+
+`run` không cần mạng: phản hồi GraphQL được lấy từ tệp ghi sẵn (JSONL/HAR) hoặc sinh giả,
+ảnh được phục vụ bởi một máy chủ HTTP cục bộ.
+"""
+import os
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+
+from scraper import InstagramScraper, ThreadsScraper, FacebookScraper
+from scraper.history import HistoryStore
+from scraper.extract import MediaItem
+from .fixtures import load_fixtures, synthesize, FixtureRecorder
+from .harness import offline_scraper, feed_capture, ImageServer, measure
+from .startup import measure_startup
+
+SCRAPERS = {'instagram': InstagramScraper, 'threads': ThreadsScraper, 'facebook': FacebookScraper}
+
+
+def _consume(generator):
+    """Chạy hết một generator sự kiện và trả về giá trị return của nó."""
+    while True:
+        try:
+            next(generator)
+        except StopIteration as stop:
+            return stop.value
+
+
+def bench_platform(platform, items, repeat, profile_calls, tmp_root):
+    scraper = offline_scraper(SCRAPERS[platform], tempfile.mkdtemp(dir=tmp_root))
+    total_bytes = sum(len(body) for _, body in items)
+    results = []
+    try:
+        def collect():
+            scraper._clean_driver_requests()
+            feed_capture(scraper, items)
+            scraper._get_all_nodes()
+            return len(items), total_bytes
+
+        results.append(measure(f"{platform}.collect", collect, repeat))
+        nodes = list(scraper.collector.nodes)
+
+        def extract():
+            scraper._extract_info_nodes(nodes)
+            return len(nodes), 0
+
+        results.append(measure(f"{platform}.extract", extract, repeat))
+
+        def profile():
+            for _ in range(profile_calls):
+                if not scraper._get_profile_data():
+                    raise RuntimeError(f"Không đọc được hồ sơ {platform} từ dữ liệu mẫu.")
+            return profile_calls, 0
+
+        results.append(measure(f"{platform}.profile", profile, repeat))
+    finally:
+        scraper.close()
+    return results
+
+
+def bench_download(count, size, repeat, tmp_root):
+    server = ImageServer(count, size)
+    photos = [MediaItem(server.url(index), f"https://benchmark.invalid/p/{index}/", 1700000000 + index)
+              for index in range(count)]
+    scrapers = []
+
+    def new_scraper():
+        scraper = offline_scraper(InstagramScraper, tempfile.mkdtemp(dir=tmp_root))
+        scrapers.append(scraper)
+        return scraper
+
+    def download(scraper, folder):
+        with HistoryStore(folder) as history:
+            return _consume(scraper._download_files(photos, folder, history))
+
+    def run(state):
+        scraper, folder = state
+        downloaded = download(scraper, folder)
+        if downloaded != count:
+            raise RuntimeError(f"Chỉ tải được {downloaded}/{count} tệp.")
+        return count, count * size
+
+    def cold():
+        scraper = new_scraper()
+        return scraper, tempfile.mkdtemp(dir=scraper.working_dir)
+
+    def blob_hit():
+        # Kho blob đã có đủ nội dung: lần tải thứ hai chỉ tạo liên kết.
+        scraper, folder = cold()
+        download(scraper, folder)
+        return scraper, tempfile.mkdtemp(dir=scraper.working_dir)
+
+    try:
+        return [
+            measure("download.cold", run, repeat, setup=cold),
+            measure("download.blob_hit", run, repeat, setup=blob_hit),
+        ]
+    finally:
+        for scraper in scrapers:
+            scraper.close()
+        server.close()
+
+
+def _format_bytes(value):
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def run(args):
+    fixtures = dict(entry.split('=', 1) for entry in args.fixtures)
+    platforms = args.platform or list(SCRAPERS)
+    tmp_root = tempfile.mkdtemp(prefix="benchmarks-")
+    results = []
+    try:
+        for platform in platforms:
+            if platform in fixtures:
+                items = load_fixtures(fixtures[platform])
+            else:
+                items = synthesize(platform, pages=args.pages, per_page=args.per_page)
+            results.extend(bench_platform(platform, items, args.repeat, args.profile_calls, tmp_root))
+        if args.images:
+            results.extend(bench_download(args.images, args.image_size, args.repeat, tmp_root))
+    finally:
+        shutil.rmtree(tmp_root, ignore_errors=True)
+
+    print(f"{'benchmark':<22}{'ops':>8}{'ops/s':>14}{'bytes/s':>14}{'peak mem':>14}")
+    for result in results:
+        print(f"{result['name']:<22}{result['ops']:>8}{result['ops_per_s']:>14.1f}"
+              f"{_format_bytes(result['bytes_per_s']) + '/s':>14}{_format_bytes(result['peak_bytes']):>14}")
+    if args.json:
+        with open(args.json, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+def record(args):
+    """Cào thật một người dùng và ghi các phản hồi GraphQL ra tệp JSONL để phát lại sau."""
+    working_dir = tempfile.mkdtemp(prefix="benchmarks-record-")
+    scraper = SCRAPERS[args.platform](headless=not args.show, working_dir=working_dir)
+    recorder = FixtureRecorder(args.output, scraper.capture.queries, scraper.capture.intercept)
+    scraper.driver.response_interceptor = recorder
+    try:
+        for event in scraper.scrape_user(args.user):
+            print(event)
+    finally:
+        recorder.close()
+        scraper.close()
+        shutil.rmtree(working_dir, ignore_errors=True)
+
+
+def startup(args):
+    """Đo thời gian khởi động và RSS của app.py ở chế độ chỉ thư viện ảnh và chế độ đầy đủ."""
+    app_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    results = measure_startup(app_dir, args.repeat)
+    print(f"{'mode':<18}{'import app':>12}{'+ scrapers':>12}{'peak RSS':>14}{'selenium-wire':>15}{'Pillow':>8}")
+    for result in results:
+        scraper_import = f"{result['scraper_import_seconds'] * 1000:.0f} ms" if result['scraper_import_seconds'] else "-"
+        print(f"{result['mode']:<18}{result['import_seconds'] * 1000:>9.0f} ms{scraper_import:>12}"
+              f"{_format_bytes(result['peak_rss_bytes']):>14}{'có' if result['seleniumwire_loaded'] else 'không':>15}"
+              f"{'có' if result['pil_loaded'] else 'không':>8}")
+    if args.json:
+        with open(args.json, 'a', encoding='utf-8') as f:
+            for result in results:
+                f.write(json.dumps(result) + '\n')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Chạy bộ đo hiệu năng ngoại tuyến.")
+    run_parser.add_argument("--platform", action="append", choices=list(SCRAPERS),
+                            help="Nền tảng cần đo (mặc định: tất cả).")
+    run_parser.add_argument("--fixtures", action="append", default=[], metavar="NỀN_TẢNG=TỆP",
+                            help="Dùng phản hồi đã ghi (JSONL hoặc HAR) thay cho dữ liệu giả.")
+    run_parser.add_argument("--pages", type=int, default=20, help="Số trang GraphQL giả mỗi nền tảng.")
+    run_parser.add_argument("--per-page", type=int, default=12, help="Số bài đăng mỗi trang giả.")
+    run_parser.add_argument("--profile-calls", type=int, default=100, help="Số lần đọc hồ sơ mỗi lần đo.")
+    run_parser.add_argument("--images", type=int, default=200, help="Số ảnh giả để đo tải xuống (0 = bỏ qua).")
+    run_parser.add_argument("--image-size", type=int, default=256 * 1024, help="Kích thước mỗi ảnh giả (byte).")
+    run_parser.add_argument("--repeat", type=int, default=5, help="Số lần lặp mỗi phép đo.")
+    run_parser.add_argument("--json", help="Ghi thêm kết quả (JSON mỗi dòng) vào tệp này.")
+    run_parser.set_defaults(handler=run)
+
+    record_parser = commands.add_parser("record", help="Ghi phản hồi GraphQL của một lần cào thật.")
+    record_parser.add_argument("platform", choices=list(SCRAPERS))
+    record_parser.add_argument("user")
+    record_parser.add_argument("output", help="Tệp JSONL đầu ra.")
+    record_parser.add_argument("--show", action="store_true", help="Hiển thị trình duyệt.")
+    record_parser.set_defaults(handler=record)
+
+    startup_parser = commands.add_parser("startup", help="Đo thời gian import và RSS của app.py.")
+    startup_parser.add_argument("--repeat", type=int, default=3, help="Số lần đo mỗi chế độ.")
+    startup_parser.add_argument("--json", help="Ghi thêm kết quả (JSON mỗi dòng) vào tệp này.")
+    startup_parser.set_defaults(handler=startup)
+
+    args = parser.parse_args(argv)
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import json
+import base64
+import threading
+from seleniumwire.utils import decode
+
+# Truy vấn phân trang và truy vấn hồ sơ của từng nền tảng, dùng khi sinh dữ liệu giả.
+PLATFORM_QUERIES = {
+    'instagram': ('PolarisProfilePostsQuery', 'PolarisProfilePageContentQuery'),
+    'threads': ('BarcelonaProfileThreadsTabRefetchableDirectQuery', None),
+    'facebook': ('ProfileCometAppCollectionPhotosRendererPaginationQuery', None),
+}
+
+
+def load_fixtures(path):
+    """
+    Đọc các phản hồi GraphQL đã ghi lại thành danh sách (name, body: bytes).
+    Hỗ trợ JSONL ({"name", "body"} mỗi dòng) và HAR xuất từ DevTools của trình duyệt.
+    """
+    if path.endswith('.har'):
+        return _load_har(path)
+    items = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                item = json.loads(line)
+                items.append((item['name'], item['body'].encode('utf-8')))
+    return items
+
+
+def _load_har(path):
+    with open(path, 'r', encoding='utf-8') as f:
+        har = json.load(f)
+    items = []
+    for entry in har['log']['entries']:
+        headers = {header['name'].lower(): header['value'] for header in entry['request']['headers']}
+        name = headers.get('x-fb-friendly-name')
+        content = entry['response'].get('content', {})
+        if not name or 'text' not in content:
+            continue
+        body = content['text']
+        body = base64.b64decode(body) if content.get('encoding') == 'base64' else body.encode('utf-8')
+        items.append((name, body))
+    return items
+
+
+def save_fixtures(path, items):
+    with open(path, 'w', encoding='utf-8') as f:
+        for name, body in items:
+            f.write(json.dumps({'name': name, 'body': body.decode('utf-8')}, ensure_ascii=False) + '\n')
+
+
+class FixtureRecorder:
+    """Bọc response_interceptor của selenium-wire để ghi các phản hồi GraphQL ra tệp JSONL."""
+    def __init__(self, path, queries, intercept):
+        self.queries = set(queries)
+        self.intercept = intercept
+        self._file = open(path, 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+
+    def __call__(self, request, response):
+        name = request.headers.get('x-fb-friendly-name')
+        if name in self.queries:
+            body = decode(response.body, response.headers.get('Content-Encoding', 'identity'))
+            line = json.dumps({'name': name, 'body': body.decode('utf-8')}, ensure_ascii=False)
+            with self._lock:
+                self._file.write(line + '\n')
+        self.intercept(request, response)
+
+    def close(self):
+        self._file.close()
+
+
+def synthesize(platform, pages=20, per_page=12, image_base="https://scontent.example.invalid/v/"):
+    """Sinh phản hồi GraphQL giả có cùng cấu trúc với dữ liệu thật của `platform`."""
+    query, profile_query = PLATFORM_QUERIES[platform]
+    items = []
+    if profile_query:
+        items.append((profile_query, {'data': {'user': {'full_name': 'Benchmark User', 'id': '1000'}}}))
+    for page in range(pages):
+        edges = [_make_node(platform, page * per_page + index, image_base) for index in range(per_page)]
+        page_info = {'has_next_page': page + 1 < pages, 'end_cursor': f"cursor-{page + 1}"}
+        connection = {'edges': edges, 'page_info': page_info}
+        if platform == 'instagram':
+            data = {'data': {'xdt_api__v1__feed__user_timeline_graphql_connection': connection}}
+        elif platform == 'threads':
+            data = {'data': {'mediaData': connection}}
+        else:
+            data = {'data': {'node': {'pageItems': connection}}}
+        items.append((query, data))
+    return [(name, json.dumps(data).encode('utf-8')) for name, data in items]
+
+
+def _make_node(platform, index, image_base):
+    def image(suffix):
+        url = f"{image_base}{index}_{suffix}_n.jpg?stp=dst-jpg&_nc_ht=bench"
+        # Nhiều kích thước như dữ liệu thật, lớn nhất đứng đầu.
+        return {'candidates': [{'url': url, 'width': width, 'height': width * 5 // 4} for width in (1080, 750, 640, 480, 320)]}
+
+    taken_at = 1700000000 + index * 3600
+    # Cứ ba bài đăng có một carousel ba ảnh, giống tỉ lệ thường gặp.
+    carousel = [{'id': f"{index}{i}_1000", 'media_type': 1, 'image_versions2': image(i), 'taken_at': taken_at}
+                for i in range(3)] if index % 3 == 0 else None
+    if platform == 'instagram':
+        return {'node': {'id': f"{index}_1000", 'code': f"C{index:08d}", 'taken_at': taken_at, 'media_type': 8 if carousel else 1,
+                         'image_versions2': image(0), 'carousel_media': carousel}}
+    if platform == 'threads':
+        post = {'id': f"{index}_1000", 'code': f"T{index:08d}", 'taken_at': taken_at, 'media_type': 8 if carousel else 1,
+                'image_versions2': image(0), 'carousel_media': carousel,
+                'user': {'full_name': 'Benchmark User', 'id': '1000'}}
+        return {'node': {'thread_items': [{'post': post}]}}
+    item_id = base64.b64encode(f"app_collection_item:1000:{index}".encode('utf-8')).decode('ascii')
+    return {'node': {'id': item_id,
+                     'url': f"https://www.facebook.com/photo.php?fbid={index}&set=a.1000",
+                     'node': {'__typename': 'Photo', 'id': str(index),
+                              'viewer_image': {'uri': image(0)['candidates'][0]['url'], 'width': 1080, 'height': 1350}}}}
@@ -0,0 +1,137 @@
+import os
+import time
+import threading
+import tracemalloc
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeDriver:
+    """Thay thế tối thiểu cho WebDriver: đủ để các đường xử lý dữ liệu chạy mà không cần trình duyệt."""
+    current_url = "https://benchmark.invalid/"
+    title = "Benchmark User | Facebook"
+
+    def get(self, url):
+        self.current_url = url
+
+    def execute_script(self, script, *args):
+        return "complete" if "readyState" in script else 0
+
+    def find_element(self, by, value):
+        raise LookupError(value)
+
+    def find_elements(self, by, value):
+        return []
+
+    def get_cookies(self):
+        return []
+
+    @property
+    def requests(self):
+        return []
+
+    @requests.deleter
+    def requests(self):
+        pass
+
+    def quit(self):
+        pass
+
+
+def offline_scraper(scraper_cls, working_dir):
+    """Tạo một trình cào của `scraper_cls` dùng FakeDriver và không cần đăng nhập."""
+    class OfflineScraper(scraper_cls):
+        def _initialize_driver(self, headless):
+            return FakeDriver()
+
+        def _ensure_login(self):
+            return True
+
+    return OfflineScraper(headless=True, working_dir=working_dir)
+
+
+class _FakeMessage:
+    def __init__(self, headers, body):
+        self.headers = headers
+        self.body = body
+
+
+def feed_capture(scraper, items):
+    """Đưa các phản hồi (name, body) qua response_interceptor như khi trình duyệt nhận được."""
+    for name, body in items:
+        request = _FakeMessage({'x-fb-friendly-name': name}, b'')
+        request.method, request.url = 'POST', 'https://benchmark.invalid/graphql/query'
+        response = _FakeMessage({'Content-Encoding': 'identity'}, body)
+        response.status_code = 200
+        scraper.capture.intercept(request, response)
+
+
+class ImageServer:
+    """Máy chủ HTTP cục bộ phục vụ `count` ảnh giả, mỗi ảnh `size` byte với nội dung khác nhau."""
+    def __init__(self, count, size):
+        images = [os.urandom(size) for _ in range(count)]
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                try:
+                    data = images[int(self.path.strip('/').split('.')[0])]
+                except (ValueError, IndexError):
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "image/jpeg")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.count = count
+        self.size = size
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def url(self, index):
+        return f"http://127.0.0.1:{self._server.server_port}/{index}.jpg"
+
+    def close(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def measure(name, run, repeat=5, setup=None):
+    """
+    Chạy `run()` `repeat` lần (run trả về (số thao tác, số byte)) và trả về kết quả với
+    ops/s, bytes/s của lần nhanh nhất. Bộ nhớ đỉnh được đo ở một lần chạy riêng có
+    tracemalloc để không làm sai lệch thời gian.
+    """
+    best = None
+    for _ in range(repeat):
+        state = setup() if setup else None
+        started = time.perf_counter()
+        ops, nbytes = run(state) if setup else run()
+        elapsed = max(time.perf_counter() - started, 1e-9)
+        if best is None or elapsed < best[0]:
+            best = (elapsed, ops, nbytes)
+
+    state = setup() if setup else None
+    tracemalloc.start()
+    try:
+        run(state) if setup else run()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    elapsed, ops, nbytes = best
+    return {
+        "name": name,
+        "ops": ops,
+        "seconds": elapsed,
+        "ops_per_s": ops / elapsed,
+        "bytes_per_s": nbytes / elapsed,
+        "peak_bytes": peak,
+    }
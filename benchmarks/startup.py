@@ -0,0 +1,60 @@
+import os
+import sys
+import json
+import tempfile
+import subprocess
+
+# Chạy trong một tiến trình Python mới để đo đúng chi phí import lúc khởi động.
+_PROBE = r"""
+import sys, time, json, resource
+started = time.perf_counter()
+import app
+result = {"import_seconds": time.perf_counter() - started}
+if LOAD_SCRAPERS:
+    # Tương đương lần /scrape-stream đầu tiên: nạp các lớp trình cào.
+    started = time.perf_counter()
+    import scraper
+    for name in scraper.__all__:
+        getattr(scraper, name)
+    result["scraper_import_seconds"] = time.perf_counter() - started
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+result["peak_rss_bytes"] = rss if sys.platform == "darwin" else rss * 1024
+result["seleniumwire_loaded"] = "seleniumwire" in sys.modules
+result["pil_loaded"] = "PIL" in sys.modules
+print(json.dumps(result))
+"""
+
+MODES = (
+    # (tên, ENABLE_SCRAPING, nạp lớp trình cào sau khi khởi động)
+    ("gallery", "0", False),
+    ("full (lazy)", "1", False),
+    ("full + scrapers", "1", True),
+)
+
+
+def probe(enable_scraping, load_scrapers, app_dir):
+    # app.py đặt CloudStorage, jobs.sqlite, media_cache... theo thư mục hiện tại: chạy trong một
+    # thư mục tạm để lần đo không khởi động hàng đợi trên CSDL thật hay tạo thư mục trong dự án.
+    env = dict(os.environ, ENABLE_SCRAPING=enable_scraping,
+               PYTHONPATH=os.pathsep.join(filter(None, (app_dir, os.environ.get("PYTHONPATH")))))
+    code = _PROBE.replace("LOAD_SCRAPERS", repr(load_scrapers))
+    with tempfile.TemporaryDirectory(prefix="startup-probe-") as work_dir:
+        output = subprocess.run([sys.executable, "-c", code], cwd=work_dir, env=env,
+                                capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def measure_startup(app_dir, repeat=3):
+    """Đo thời gian import app.py và RSS đỉnh của từng chế độ (lấy lần nhanh nhất / RSS nhỏ nhất)."""
+    results = []
+    for name, enable_scraping, load_scrapers in MODES:
+        runs = [probe(enable_scraping, load_scrapers, app_dir) for _ in range(repeat)]
+        results.append({
+            "mode": name,
+            "import_seconds": min(run["import_seconds"] for run in runs),
+            "scraper_import_seconds": min(run.get("scraper_import_seconds", 0.0) for run in runs),
+            "peak_rss_bytes": min(run["peak_rss_bytes"] for run in runs),
+            "seleniumwire_loaded": runs[0]["seleniumwire_loaded"],
+            "pil_loaded": runs[0]["pil_loaded"],
+        })
+    return results
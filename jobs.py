@@ -0,0 +1,239 @@
+# jobs.py (Hàng đợi công việc cào dữ liệu chạy nền)
+
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import threading
+
+JOB_COLUMNS = ('id', 'platform', 'username', 'options', 'status', 'message', 'found',
+               'created_at', 'started_at', 'finished_at')
+# Thời hạn giữ một công việc đang chạy (giây). Tiến trình chạy công việc gia hạn định kỳ; nếu
+# tiến trình chết, hết hạn thì tiến trình khác đưa công việc về hàng đợi.
+LEASE_SECONDS = 60
+
+
+class JobStore:
+    """Hàng đợi công việc lưu trong SQLite để không bị mất khi khởi động lại."""
+    def __init__(self, db_path):
+        # Định danh tiến trình giữ công việc (nhiều worker/tiến trình dùng chung một tệp CSDL).
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    platform TEXT NOT NULL,
+                    username TEXT NOT NULL,
+                    options TEXT NOT NULL DEFAULT '{}',
+                    status TEXT NOT NULL DEFAULT 'queued',
+                    message TEXT NOT NULL DEFAULT '',
+                    found INTEGER NOT NULL DEFAULT 0,
+                    created_at REAL NOT NULL,
+                    started_at REAL,
+                    finished_at REAL,
+                    owner TEXT,
+                    lease_until REAL
+                )""")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+            for column, kind in (('owner', 'TEXT'), ('lease_until', 'REAL')):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, platform, id)")
+
+    def submit(self, platform, username, options=None):
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO jobs (platform, username, options, created_at) VALUES (?, ?, ?, ?)",
+                (platform, username, json.dumps(options or {}), time.time()))
+            return cursor.lastrowid
+
+    def claim_next(self, platform):
+        """Lấy công việc đang chờ lâu nhất của một nền tảng và đánh dấu là đang chạy."""
+        while True:
+            with self._lock, self._conn:
+                row = self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = 'queued' AND platform = ? ORDER BY id LIMIT 1",
+                    (platform,)).fetchone()
+                if row is None:
+                    return None
+                # Chỉ nhận nếu công việc vẫn đang chờ: tiến trình khác có thể đã nhận hoặc hủy nó
+                # giữa SELECT và UPDATE; khi đó thử công việc kế tiếp.
+                now = time.time()
+                cursor = self._conn.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, owner = ?, lease_until = ? "
+                    "WHERE id = ? AND status = 'queued'",
+                    (now, self.owner, now + LEASE_SECONDS, row[0]))
+            if cursor.rowcount > 0:
+                return self.get(row[0])
+
+    def update(self, job_id, **fields):
+        if not fields:
+            return
+        assignments = ", ".join(f"{key} = ?" for key in fields)
+        with self._lock, self._conn:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*fields.values(), job_id))
+
+    def cancel(self, job_id):
+        """Hủy một công việc còn đang chờ. Trả về True nếu hủy được."""
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'cancelled', finished_at = ? WHERE id = ? AND status = 'queued'",
+                (time.time(), job_id))
+            return cursor.rowcount > 0
+
+    def renew_leases(self, job_ids):
+        """Gia hạn các công việc mà tiến trình này đang chạy."""
+        if not job_ids:
+            return
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "UPDATE jobs SET lease_until = ? WHERE id = ? AND status = 'running' AND owner = ?",
+                [(time.time() + LEASE_SECONDS, job_id, self.owner) for job_id in job_ids])
+
+    def requeue_expired(self):
+        """
+        Đưa các công việc bị gián đoạn (tiến trình chạy chúng đã dừng, nên hết hạn giữ) về hàng đợi.
+        Công việc của tiến trình khác còn sống không bị động tới. Trả về số công việc đưa lại.
+        """
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, owner = NULL, lease_until = NULL "
+                "WHERE status = 'running' AND (lease_until IS NULL OR lease_until < ?)", (time.time(),))
+            return cursor.rowcount
+
+    def queued_platforms(self):
+        with self._lock:
+            rows = self._conn.execute("SELECT DISTINCT platform FROM jobs WHERE status = 'queued'").fetchall()
+        return [row[0] for row in rows]
+
+    def get(self, job_id):
+        with self._lock:
+            row = self._conn.execute(f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    def list(self, status=None, limit=200):
+        query = f"SELECT {', '.join(JOB_COLUMNS)} FROM jobs"
+        params = []
+        if status:
+            query += " WHERE status = ?"
+            params.append(status)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row):
+        job = dict(zip(JOB_COLUMNS, row))
+        job['options'] = json.loads(job['options'])
+        now = time.time()
+        # Thời gian chờ trong hàng đợi và thời gian chạy (giây).
+        job['wait_seconds'] = (job['started_at'] or job['finished_at'] or now) - job['created_at']
+        job['run_seconds'] = (job['finished_at'] or now) - job['started_at'] if job['started_at'] else None
+        return job
+
+
+class JobScheduler:
+    """
+    Chạy các công việc trong hàng đợi ở luồng nền, song song tối đa `limits[platform]`
+    công việc cho mỗi nền tảng, mỗi công việc mượn một trình cào từ pool tương ứng.
+    """
+    def __init__(self, store, pools, limits, on_finish=None, progress_interval=2.0):
+        self.store = store
+        self.pools = pools
+        self.limits = limits
+        self.on_finish = on_finish
+        self.progress_interval = progress_interval
+        self._running = {platform: 0 for platform in pools}
+        # Mã các công việc đang chạy trong tiến trình này, để gia hạn.
+        self._job_ids = set()
+        self._last_heartbeat = 0.0
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.store.requeue_expired()
+        self._thread = threading.Thread(target=self._dispatch_loop, name="job-scheduler", daemon=True)
+        self._thread.start()
+
+    def submit(self, platform, username, options=None):
+        job_id = self.store.submit(platform, username, options)
+        self.wake()
+        return job_id
+
+    def wake(self):
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self):
+        with self._cond:
+            return dict(self._running)
+
+    def _heartbeat(self):
+        """Gia hạn các công việc đang chạy và thu hồi công việc của tiến trình đã dừng."""
+        if time.monotonic() - self._last_heartbeat < LEASE_SECONDS / 3:
+            return
+        self._last_heartbeat = time.monotonic()
+        self.store.renew_leases(list(self._job_ids))
+        self.store.requeue_expired()
+
+    def _dispatch_loop(self):
+        while True:
+            with self._cond:
+                self._heartbeat()
+                started = False
+                for platform in self.store.queued_platforms():
+                    if platform not in self.pools:
+                        continue
+                    if self._running[platform] >= self.limits.get(platform, 1):
+                        continue
+                    job = self.store.claim_next(platform)
+                    if job is None:
+                        continue
+                    self._running[platform] += 1
+                    self._job_ids.add(job['id'])
+                    threading.Thread(target=self._run_job, args=(job,), name=f"job-{job['id']}", daemon=True).start()
+                    started = True
+                if not started:
+                    self._cond.wait(timeout=5)
+
+    def _run_job(self, job):
+        status, message, found = 'error', '', 0
+        last_flush = time.monotonic()
+        try:
+            with self.pools[job['platform']].lease() as scraper:
+                for event_data in scraper.scrape_users([job['username']], **job['options']):
+                    event = json.loads(event_data)
+                    data = event.get('data', {})
+                    if event['type'] == 'progress':
+                        found = data.get('found', found)
+                        if time.monotonic() - last_flush < self.progress_interval:
+                            continue
+                        last_flush = time.monotonic()
+                        self.store.update(job['id'], found=found)
+                        continue
+                    message = data.get('message', message)
+                    if event['type'] == 'done':
+                        status = 'done'
+                    elif event['type'] == 'error':
+                        status = 'error'
+                    self.store.update(job['id'], message=message, found=found)
+                if status != 'done' and not message:
+                    message = 'Công việc kết thúc mà không có kết quả.'
+        except Exception as e:
+            status, message = 'error', str(e)
+        finally:
+            self.store.update(job['id'], status=status, message=message, found=found, finished_at=time.time())
+            with self._cond:
+                self._running[job['platform']] -= 1
+                self._job_ids.discard(job['id'])
+                self._cond.notify_all()
+            if self.on_finish:
+                self.on_finish(job)
@@ -0,0 +1,108 @@
+# listing.py (Bộ nhớ đệm liệt kê thư mục cho /api/content)
+
+import os
+import base64
+import bisect
+import threading
+from collections import OrderedDict, namedtuple
+
+# Các thuộc tính trùng tên với os.stat_result để có thể dùng thay cho stat.
+ListingEntry = namedtuple('ListingEntry', ['name', 'st_size', 'st_mtime_ns'])
+
+SORT_KEYS = {
+    'name': lambda entry: entry.name,
+    # Mới nhất trước; tên tệp giúp thứ tự ổn định khi trùng thời gian.
+    'date': lambda entry: (-entry.st_mtime_ns, entry.name),
+}
+
+
+class DirectoryListing:
+    """Ảnh chụp nội dung một thư mục: tệp (kèm kích thước/mtime) và thư mục con."""
+    def __init__(self, mtime_ns, files, dirs):
+        self.mtime_ns = mtime_ns
+        self.files = files
+        self.dirs = dirs
+        self._orders = {}
+
+    def _order(self, sort):
+        if sort not in self._orders:
+            key = SORT_KEYS[sort]
+            entries = sorted(self.files, key=key)
+            self._orders[sort] = (entries, [key(entry) for entry in entries])
+        return self._orders[sort]
+
+    def page(self, sort='name', cursor=None, limit=200):
+        """Trả về (các tệp của trang, con trỏ trang tiếp theo hoặc None)."""
+        entries, keys = self._order(sort)
+        start = 0
+        if cursor:
+            start = bisect.bisect_right(keys, decode_cursor(cursor, sort))
+        items = entries[start:start + limit]
+        next_cursor = None
+        if start + limit < len(entries):
+            next_cursor = encode_cursor(keys[start + limit - 1], sort)
+        return items, next_cursor
+
+
+def encode_cursor(key, sort):
+    raw = f"{-key[0]}\x00{key[1]}" if sort == 'date' else key
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor, sort):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8')
+        if sort == 'date':
+            mtime_ns, name = raw.split('\x00', 1)
+            return (-int(mtime_ns), name)
+        return raw
+    except (ValueError, UnicodeError):
+        raise ValueError("Con trỏ phân trang không hợp lệ.")
+
+
+class ListingCache:
+    """
+    Bộ đệm LRU các DirectoryListing, dựng bằng os.scandir. Một mục được coi là cũ khi
+    mtime của thư mục thay đổi hoặc khi ứng dụng gọi invalidate() sau khi tự thay đổi thư mục.
+    """
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, path, accept=None):
+        mtime_ns = os.stat(path).st_mtime_ns
+        with self._lock:
+            listing = self._entries.get(path)
+            if listing is not None and listing.mtime_ns == mtime_ns:
+                self._entries.move_to_end(path)
+                return listing
+        listing = self._scan(path, mtime_ns, accept)
+        with self._lock:
+            self._entries[path] = listing
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return listing
+
+    def invalidate(self, *paths):
+        with self._lock:
+            for path in paths:
+                self._entries.pop(path, None)
+
+    @staticmethod
+    def _scan(path, mtime_ns, accept):
+        files, dirs = [], []
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                    elif entry.is_file() and (accept is None or accept(entry.name)):
+                        stat = entry.stat()
+                        files.append(ListingEntry(entry.name, stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    continue
+        return DirectoryListing(mtime_ns, files, sorted(dirs))
@@ -1,6 +1,18 @@
 # from .Scraper import InstagramScraper, ThreadsScraper, FacebookScraper
-from .instagram import InstagramScraper
-from .threads import ThreadsScraper
-from .facebook import FacebookScraper
+import importlib
 
-__all__ = ['InstagramScraper', 'ThreadsScraper', 'FacebookScraper']
\ No newline at end of file
+# Các lớp trình cào được nạp khi truy cập lần đầu, để `import scraper.pool` hay
+# `import scraper.metrics` không kéo theo selenium-wire và mitmproxy.
+_SCRAPER_MODULES = {
+    'InstagramScraper': '.instagram',
+    'ThreadsScraper': '.threads',
+    'FacebookScraper': '.facebook',
+}
+
+__all__ = ['InstagramScraper', 'ThreadsScraper', 'FacebookScraper']
+
+
+def __getattr__(name):
+    if name in _SCRAPER_MODULES:
+        return getattr(importlib.import_module(_SCRAPER_MODULES[name], __name__), name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,77 @@
+"""
+Cào hàng loạt không qua giao diện web.
+
+    python -m scraper accounts.txt [--workers 4] [--output events.ndjson]
+
+Mỗi dòng của tệp tài khoản có dạng 'platform:username' (instagram, threads, facebook);
+dòng trống và dòng bắt đầu bằng # được bỏ qua. Dùng '-' để đọc từ stdin.
+Mỗi sự kiện được ghi thành một dòng JSON. Cần có sẵn tệp cookie của từng nền tảng
+(đăng nhập một lần qua ứng dụng web); nếu thiếu, lệnh dừng ngay thay vì hỏi đăng nhập.
+
+Mã thoát: 0 khi thành công, 1 khi có tài khoản lỗi, 2 khi đầu vào hoặc cookie không hợp lệ.
+"""
+import os
+import sys
+import json
+import argparse
+
+from .batch import parse_accounts, missing_cookies, run_batch
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m scraper", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("accounts", help="Tệp chứa các dòng platform:username ('-' = stdin).")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                        help="Số tiến trình cào song song, mỗi tiến trình một trình duyệt (mặc định: số lõi CPU).")
+    parser.add_argument("--output", help="Ghi sự kiện vào tệp này thay vì stdout.")
+    parser.add_argument("--working-dir", default="CloudStorage",
+                        help="Thư mục lưu ảnh, cùng thư mục với ứng dụng web (mặc định: CloudStorage; "
+                             "cookie đọc từ thư mục cookies/ hiện tại).")
+    parser.add_argument("--download-workers", type=int, default=8, help="Số luồng tải ảnh của mỗi trình cào.")
+    parser.add_argument("--mode", choices=("scroll", "api"), default="scroll",
+                        help="'api' phát lại truy vấn GraphQL thay vì cuộn trang.")
+    parser.add_argument("--incremental", action="store_true", help="Dừng khi gặp trang đã tải trước đó.")
+    parser.add_argument("--show", action="store_true", help="Hiển thị trình duyệt.")
+    args = parser.parse_args(argv)
+
+    if args.accounts == '-':
+        accounts, errors = parse_accounts(sys.stdin)
+    else:
+        with open(args.accounts, 'r', encoding='utf-8') as f:
+            accounts, errors = parse_accounts(f)
+    for error in errors:
+        print(error, file=sys.stderr)
+    if errors:
+        return 2
+    if not accounts:
+        print("Không có tài khoản nào để cào.", file=sys.stderr)
+        return 0
+
+    output = open(args.output, 'a', encoding='utf-8') if args.output else sys.stdout
+    try:
+        missing = missing_cookies(platform for platform, _ in accounts)
+        if missing:
+            message = f"Thiếu tệp cookie cho: {', '.join(missing)}. Hãy đăng nhập qua ứng dụng web trước."
+            output.write(json.dumps({"type": "error", "data": {"message": message}}, ensure_ascii=False) + '\n')
+            print(message, file=sys.stderr)
+            return 2
+        options = {
+            'headless': not args.show,
+            'working_dir': args.working_dir,
+            'download_workers': args.download_workers,
+            'api_replay': args.mode == "api",
+            'incremental': args.incremental,
+        }
+        failed = run_batch(accounts, output, args.workers, options)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    if failed:
+        print(f"{failed} tài khoản gặp lỗi.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,22 +4,99 @@ import time
 import pickle
 import re
 import base64
-from urllib.request import urlretrieve
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import hashlib
+from urllib.parse import urlsplit
 from seleniumwire import webdriver
 from selenium.webdriver.common.by import By
-from seleniumwire.utils import decode
-from tqdm import tqdm
 from datetime import datetime, timezone
+from .blobs import BlobStore
+from .capture import CaptureBuffer
+from .collector import NodeCollector
+from .downloader import Downloader
+from .replay import GraphQLReplayer
+from .history import media_key
+from .profiles import ProfileSlot
+from .ratelimit import RATE_LIMITER
+from .metrics import PhaseTimer, DRIVER_STARTUP, record_phases
+from .waits import wait_until, wait_for_stable, MUTATION_OBSERVER_SCRIPT, RESOURCE_COUNT_SCRIPT
+
+# Mẫu URL (wildcard của CDP Network.setBlockedURLs) cho từng loại tài nguyên có thể chặn.
+# Ảnh được chặn bằng cài đặt nội dung của Chrome nên không cần mẫu URL.
+RESOURCE_URL_PATTERNS = {
+    "media": ("*.mp4*", "*.m4s*", "*.m4a*", "*.webm*"),
+    "font": ("*.woff*", "*.ttf*", "*.otf*", "*.eot*"),
+    "stylesheet": ("*.css*",),
+}
+
+class LoginRequiredError(RuntimeError):
+    """Không có cookie đăng nhập và không được phép hỏi người dùng (chế độ không tương tác)."""
+
 
 class BaseScraper:
     """
     Lớp cơ sở cho trình cào dữ liệu mạng xã hội, cung cấp các chức năng chung.
     """
-    def __init__(self, headless=True, working_dir="CloudStorage"):
-        self.driver = self._initialize_driver(headless=headless)
+    # Tên nền tảng, dùng làm nhãn số liệu.
+    PLATFORM = None
+    # Các truy vấn GraphQL (x-fb-friendly-name) chứa danh sách bài đăng.
+    GRAPHQL_QUERIES = ()
+    # Mô tả cách lấy connection và media từ payload GraphQL (extract.MediaExtractor).
+    EXTRACTOR = None
+    # Truy vấn GraphQL chứa thông tin hồ sơ (nếu có).
+    PROFILE_QUERY = None
+    # Tên biến con trỏ phân trang trong `variables` của truy vấn GraphQL.
+    PAGINATION_CURSOR_VARIABLE = "after"
+    HOME_URL = None
+    COOKIE_FILE = None
+    # Cookie chỉ có khi đã đăng nhập; dùng để nhận biết hồ sơ trình duyệt đã đăng nhập sẵn.
+    SESSION_COOKIE = None
+    # Các URL (regex) mà selenium-wire chặn bắt; mọi yêu cầu khác đi thẳng qua proxy.
+    CAPTURE_SCOPES = ()
+    # Số phản hồi GraphQL giữ trong bộ nhớ trước khi ghi tạm ra đĩa.
+    CAPTURE_QUEUE_SIZE = 32
+    # Hồ sơ chặn tài nguyên: trình duyệt chỉ cần GraphQL và DOM, ảnh/video được tải lại
+    # bằng Downloader nên không cần tải trong trình duyệt. CSS vẫn được tải mặc định vì
+    # cuộn vô hạn dựa vào bố cục trang.
+    BLOCKED_RESOURCE_TYPES = ("image", "media", "font")
+    # Mẫu URL bổ sung riêng cho từng nền tảng (ví dụ: máy chủ video).
+    BLOCKED_URL_PATTERNS = ()
+    # Thời gian chờ tối đa (giây) cho từng loại tín hiệu; các lớp con có thể ghi đè.
+    WAIT_TIMEOUTS = {
+        "page": 15,      # trang tải xong / hồ sơ xuất hiện
+        "scroll": 8,     # phản hồi phân trang tiếp theo sau một lần cuộn
+        "element": 10,   # phần tử DOM cần thiết xuất hiện
+        "idle": 0.3,     # khoảng lặng DOM/mạng coi như đã ổn định
+    }
+    # Số lần cuộn liên tiếp không có dữ liệu mới trước khi coi là đã hết trang.
+    SCROLL_RETRIES = 2
+    # Số lần thử lại tối đa khi đọc hồ sơ.
+    PROFILE_RETRIES = 3
+    # Số tab mở song song khi truy cập từng bài đăng ở bước trích xuất HTML.
+    HTML_FALLBACK_TABS = 4
+    # Điểm lưu cũ hơn (giây) bị bỏ qua: con trỏ phân trang của nó thường đã hết hạn.
+    CHECKPOINT_MAX_AGE = 24 * 3600
+
+    def __init__(self, headless=True, working_dir="CloudStorage", download_workers=10, block_resources=True,
+                 profile_root="browser_profiles"):
+        self.block_resources = block_resources
+        # Thư mục chứa các hồ sơ Chrome bền vững của nền tảng (None = hồ sơ tạm mỗi lần).
+        self.profile_root = os.path.join(profile_root, self.PLATFORM) if profile_root else None
+        self.profile = None
+        self._saved_cookies = None
         self.working_dir = os.path.realpath(working_dir)
         os.makedirs(self.working_dir, exist_ok=True)
+        self.blobs = BlobStore(self.working_dir)
+        self.downloader = Downloader(workers=download_workers, blobs=self.blobs)
+        self.collector = NodeCollector(self.GRAPHQL_QUERIES, self._get_connection)
+        if self.PROFILE_QUERY:
+            self.collector.watch(self.PROFILE_QUERY)
+        queries = set(self.GRAPHQL_QUERIES) | ({self.PROFILE_QUERY} if self.PROFILE_QUERY else set())
+        self.capture = CaptureBuffer(queries, max_items=self.CAPTURE_QUEUE_SIZE)
+        self.timings = PhaseTimer()
+        started = time.perf_counter()
+        self.driver = self._initialize_driver(headless=headless)
+        DRIVER_STARTUP.observe(time.perf_counter() - started, platform=self.PLATFORM)
+        self._logged_in = False
 
     def _initialize_driver(self, headless):
         """Khởi tạo WebDriver của Selenium với các tùy chọn được định cấu hình."""
@@ -33,93 +110,493 @@ class BaseScraper:
         options.add_argument('--disable-infobars')
         if headless:
             options.add_argument('--headless')
-        driver = webdriver.Chrome(options=options)
+        if self.profile_root:
+            # Cookie, bộ nhớ đệm và trạng thái đăng nhập được giữ lại giữa các lần chạy.
+            self.profile = ProfileSlot(self.profile_root)
+            options.add_argument(f'--user-data-dir={os.path.realpath(self.profile.path)}')
+        if self.block_resources and "image" in self.BLOCKED_RESOURCE_TYPES:
+            # Không tải ảnh nhưng thẻ <img> và thuộc tính src vẫn có trong DOM.
+            options.add_experimental_option('prefs', {'profile.managed_default_content_settings.images': 2})
+        # Phản hồi được đọc qua response_interceptor; kho yêu cầu của selenium-wire chỉ
+        # giữ các URL trong scopes, trong bộ nhớ và với số lượng có giới hạn.
+        seleniumwire_options = {'request_storage': 'memory', 'request_storage_max_size': 50}
+        try:
+            driver = webdriver.Chrome(options=options, seleniumwire_options=seleniumwire_options)
+        except Exception:
+            if self.profile is not None:
+                self.profile.release()
+            raise
+        driver.scopes = list(self.CAPTURE_SCOPES)
+        driver.response_interceptor = self.capture.intercept
+        self._apply_blocking_profile(driver)
         # driver.set_window_size(300, 1400)
         return driver
 
+    def _apply_blocking_profile(self, driver):
+        """Chặn các URL trong hồ sơ chặn tài nguyên cho tab hiện tại (mỗi tab mới cần gọi lại)."""
+        if not self.block_resources:
+            return
+        patterns = [pattern for resource_type in self.BLOCKED_RESOURCE_TYPES
+                    for pattern in RESOURCE_URL_PATTERNS.get(resource_type, ())]
+        patterns.extend(self.BLOCKED_URL_PATTERNS)
+        if patterns:
+            driver.execute_cdp_cmd('Network.enable', {})
+            driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': patterns})
+
     def _yield_event(self, event_type, data):
         """Helper function to format and yield event data."""
         return json.dumps({"type": event_type, "data": data})
 
+    def _done_event(self, message):
+        """Sự kiện 'done' kèm thời gian từng giai đoạn; đồng thời cộng dồn vào số liệu /metrics."""
+        record_phases(self.PLATFORM, self.timings)
+        self._refresh_saved_cookies()
+        return self._yield_event("done", {"message": message, "timings": self.timings.summary()})
+
     def _waiting_for_page_load(self):
         return self.driver.execute_script("return document.readyState") == "complete"
+
+    def _wait_for_page_load(self, timeout=None):
+        """Chờ document.readyState == 'complete'."""
+        return wait_until(self._waiting_for_page_load, timeout or self.WAIT_TIMEOUTS["page"])
+
+    def _wait_for_element(self, by, value, timeout=None):
+        """Chờ một phần tử xuất hiện; trả về phần tử hoặc None khi hết thời gian."""
+        elements = wait_until(lambda: self.driver.find_elements(by, value), timeout or self.WAIT_TIMEOUTS["element"])
+        return elements[0] if elements else None
+
+    def _wait_for_dom_idle(self, idle=None, timeout=None):
+        """Chờ cho tới khi DOM không thay đổi trong `idle` giây."""
+        idle = idle or self.WAIT_TIMEOUTS["idle"]
+        return wait_until(
+            lambda: self.driver.execute_script(MUTATION_OBSERVER_SCRIPT) >= idle * 1000,
+            timeout or self.WAIT_TIMEOUTS["element"],
+        )
+
+    def _wait_for_network_idle(self, idle=None, timeout=None):
+        """Chờ cho tới khi trình duyệt không tải thêm tài nguyên nào trong `idle` giây."""
+        return wait_for_stable(
+            lambda: self.driver.execute_script(RESOURCE_COUNT_SCRIPT),
+            idle or self.WAIT_TIMEOUTS["idle"],
+            timeout or self.WAIT_TIMEOUTS["page"],
+        )
+
+    def _wait_for_new_nodes(self, count, timeout=None):
+        """Chờ phản hồi phân trang tiếp theo trong bộ đệm bắt gói (số nút vượt quá `count`)."""
+        return wait_until(lambda: len(self._get_all_nodes()) > count, timeout or self.WAIT_TIMEOUTS["scroll"])
+
+    def _reload_profile_page(self):
+        """Tải lại trang để trang gửi lại truy vấn hồ sơ trước một lần thử lại."""
+        self._clean_driver_requests()
+        self.driver.refresh()
+
+    def _wait_for_profile(self):
+        """Chờ dữ liệu hồ sơ xuất hiện, tải lại trang rồi thử lại có giới hạn."""
+        for attempt in range(self.PROFILE_RETRIES):
+            if attempt:
+                self._reload_profile_page()
+            profile_data = wait_until(self._get_profile_data, self.WAIT_TIMEOUTS["page"],
+                                      ignored_exceptions=(KeyError, IndexError, TypeError))
+            if profile_data:
+                return profile_data
+        return None
     
+    def is_alive(self):
+        """Kiểm tra trình duyệt còn phản hồi hay không."""
+        try:
+            return self.driver.execute_script("return 1") == 1
+        except Exception:
+            return False
+
+    def _ensure_login(self):
+        """
+        Đảm bảo phiên trình duyệt đã đăng nhập; cookie chỉ được nạp một lần cho mỗi driver.
+        Trạng thái đăng nhập được đọc qua CDP nên không cần tải trang chủ: hồ sơ bền vững
+        đã có cookie phiên thì dùng luôn, nếu không thì nạp tệp cookie đã lưu.
+        """
+        if self._logged_in:
+            return True
+        with self.timings.phase("login"):
+            self._saved_cookies = self._read_cookie_file(self.COOKIE_FILE)
+            if any(cookie['name'] == self.SESSION_COOKIE for cookie in self._browser_cookies()):
+                self._logged_in = True
+            else:
+                self._logged_in = self._load_cookies(self.COOKIE_FILE)
+        return self._logged_in
+
+    @classmethod
+    def has_cookies(cls):
+        """True nếu đã có tệp cookie đăng nhập (kiểm tra trước khi khởi động trình duyệt)."""
+        return os.path.exists(cls.COOKIE_FILE)
+
+    def _login(self, interactive=True):
+        """
+        Đăng nhập bằng cookie đã lưu. Nếu chưa có cookie: hỏi người dùng đăng nhập thủ công
+        khi interactive=True, ngược lại đóng trình duyệt và ném LoginRequiredError.
+        """
+        if self._ensure_login():
+            return
+        name = self.PLATFORM.capitalize()
+        if not interactive:
+            self.close()
+            raise LoginRequiredError(f"Không tìm thấy cookie {name} ({self.COOKIE_FILE}). Vui lòng đăng nhập và lưu cookie trước.")
+        self.driver.get(self.HOME_URL)
+        print(f"Vui lòng đăng nhập vào {name} và lưu cookie.")
+        input("Nhấn Enter sau khi đăng nhập...")
+        self._save_cookies(self.COOKIE_FILE)
+        self._logged_in = True
+
     def _clean_driver_requests(self):
         del self.driver.requests
+        self.capture.reset()
+        self.collector.reset()
+        if self.PROFILE_QUERY:
+            self.collector.watch(self.PROFILE_QUERY)
+
+    @staticmethod
+    def _read_cookie_file(cookie_file):
+        if not os.path.exists(cookie_file):
+            return None
+        with open(cookie_file, "rb") as f:
+            return pickle.load(f)
+
+    @staticmethod
+    def _cookie_digest(cookies):
+        fields = sorted((c['name'], c['value'], c.get('domain'), c.get('path'), c.get('expiry')) for c in cookies or ())
+        return hashlib.sha1(json.dumps(fields).encode('utf-8')).hexdigest()
+
+    def _browser_cookies(self):
+        """
+        Cookie của nền tảng trong trình duyệt, theo định dạng của driver.get_cookies().
+        Đọc qua CDP nên không phụ thuộc trang đang mở (kể cả about:blank).
+        """
+        domain = urlsplit(self.HOME_URL).hostname.removeprefix('www.')
+        cookies = []
+        for cookie in self.driver.execute_cdp_cmd('Network.getAllCookies', {})['cookies']:
+            if not cookie['domain'].lstrip('.').endswith(domain):
+                continue
+            converted = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly')}
+            if not cookie.get('session') and cookie.get('expires', -1) > 0:
+                converted['expiry'] = int(cookie['expires'])
+            if cookie.get('sameSite'):
+                converted['sameSite'] = cookie['sameSite']
+            cookies.append(converted)
+        return cookies
 
     def _load_cookies(self, cookie_file):
-        """Tải cookie từ một tệp và thêm chúng vào phiên trình duyệt."""
-        if os.path.exists(cookie_file):
-            with open(cookie_file, "rb") as f:
-                cookies = pickle.load(f)
-            for cookie in cookies:
-                self.driver.add_cookie(cookie)
-            return True
-        return False
+        """Tải cookie từ một tệp vào trình duyệt qua CDP (không cần mở trang của nền tảng)."""
+        cookies = self._read_cookie_file(cookie_file)
+        if cookies is None:
+            return False
+        params = []
+        for cookie in cookies:
+            param = {key: cookie[key] for key in ('name', 'value', 'domain', 'path', 'secure', 'httpOnly', 'sameSite')
+                     if key in cookie}
+            if 'expiry' in cookie:
+                param['expires'] = cookie['expiry']
+            params.append(param)
+        self.driver.execute_cdp_cmd('Network.setCookies', {'cookies': params})
+        return True
 
     def _save_cookies(self, cookie_file):
         """Lưu cookie của phiên trình duyệt hiện tại vào một tệp."""
+        cookies = self._browser_cookies()
         os.makedirs(os.path.dirname(cookie_file), exist_ok=True)
-        with open(cookie_file, "wb") as f:
-            pickle.dump(self.driver.get_cookies(), f)
+        # Ghi tệp tạm rồi thay thế: nhiều trình duyệt của cùng nền tảng có thể lưu cùng lúc.
+        tmp_file = f"{cookie_file}.{os.getpid()}.{id(self)}.tmp"
+        with open(tmp_file, "wb") as f:
+            pickle.dump(cookies, f)
+        os.replace(tmp_file, cookie_file)
+        self._saved_cookies = cookies
+
+    def _refresh_saved_cookies(self):
+        """Ghi lại tệp cookie chỉ khi cookie trong trình duyệt đã thay đổi (ví dụ: phiên được gia hạn)."""
+        if not self._logged_in:
+            return
+        try:
+            cookies = self._browser_cookies()
+        except Exception as e:
+            print(f"Không đọc được cookie {self.PLATFORM}: {e}")
+            return
+        if self._cookie_digest(cookies) != self._cookie_digest(self._saved_cookies):
+            self._save_cookies(self.COOKIE_FILE)
     
-    def _download_files(self, photos, download_dir, history_file):
-        """Tải xuống tệp bằng đa luồng, bỏ qua các tệp đã tồn tại."""
+    def _download_files(self, photos, download_dir, history):
+        """
+        Tải xuống tệp bằng đa luồng, bỏ qua các media đã có trong lịch sử (HistoryStore)
+        hoặc đã tồn tại trên đĩa. Media đã có trong kho blob chỉ được liên kết, không tải lại.
+        Trả về số tệp đã thêm vào thư mục.
+        """
+        with self.timings.phase("download"):
+            downloaded = yield from self._download_new_files(photos, download_dir, history)
+        return downloaded
+
+    def _download_new_files(self, photos, download_dir, history):
         os.makedirs(download_dir, exist_ok=True)
-        
-        history = set()
-        if os.path.exists(history_file):
-            with open(history_file, "r") as f:
-                history = set(line.split(',')[0].strip() for line in f.read().splitlines())
+        known = history.known(media_key(photo.url) for photo in photos)
 
-        new_photos = [photo for photo in photos if photo[1] not in history]
+        jobs = {}
+        keys = set()
+        for photo in photos:
+            image_url, post_url, taken_at = photo.url, photo.post_url, photo.taken_at
+            key = media_key(image_url)
+            # Cùng một media có thể xuất hiện nhiều lần (carousel, GraphQL và HTML).
+            if key in known or key in keys:
+                continue
+            filename = f"{datetime.fromtimestamp(taken_at).strftime('%Y%m%d_%H%M%S')}_{key}" if taken_at else key
+            filepath = os.path.join(download_dir, filename)
+            if filepath not in jobs and not os.path.exists(filepath):
+                keys.add(key)
+                jobs[filepath] = (image_url, filepath, (key, post_url, taken_at))
 
-        if not new_photos:
-            yield self._yield_event("status", {"message": "Không có ảnh mới để tải xuống."})
-            return
+        linked = 0
+        stored = self.blobs.lookup(keys)
+        for filepath, (image_url, _, (key, post_url, taken_at)) in list(jobs.items()):
+            if key in stored:
+                self.blobs.link(stored[key], filepath)
+                history.add(key, post_url, os.path.basename(filepath), taken_at, stored[key])
+                del jobs[filepath]
+                linked += 1
+        if linked:
+            self.timings.add("download", linked=linked)
+            yield self._yield_event("status", {"message": f"Đã liên kết {linked} tệp có sẵn trong kho."})
 
-        yield self._yield_event("status", {"message": f"Bắt đầu tải xuống {len(new_photos)} tệp mới..."})
+        if not jobs:
+            if not linked:
+                yield self._yield_event("status", {"message": "Không có ảnh mới để tải xuống."})
+            return linked
 
-        def download_and_record(photo):
-            image_url, post_url, taken_at = photo
-            filename = image_url.split("/")[-1].split('?')[0]
-            filename = f"{datetime.fromtimestamp(taken_at).strftime('%Y%m%d_%H%M%S')}_{filename}" if taken_at else filename
-            filepath = os.path.join(download_dir, filename)
-            
-            if not os.path.exists(filepath):
+        yield self._yield_event("status", {"message": f"Bắt đầu tải xuống {len(jobs)} tệp mới..."})
+
+        completed = 0
+        # Chỉ luồng này ghi lịch sử, các luồng tải chỉ báo kết quả qua sự kiện.
+        for event in self.downloader.download(list(jobs.values())):
+            data = {key: event[key] for key in ("completed", "failed", "total", "bytes", "rate")}
+            data["phase"] = "download"
+            if event["kind"] == "file":
+                file_info = event["file"]
+                data["file"] = {key: file_info[key] for key in ("name", "bytes", "rate", "error")}
+                if file_info["error"]:
+                    print(f"Lỗi khi tải {file_info['url']}: {file_info['error']}")
+                    self.timings.add("download", failed=1)
+                else:
+                    self.timings.add("download", files=1, bytes=file_info["bytes"])
+                    key, post_url, taken_at = file_info["context"]
+                    self.blobs.add(key, file_info["digest"])
+                    history.add(key, post_url, file_info["name"], taken_at, file_info["digest"])
+            yield self._yield_event("progress", data)
+            completed = event["completed"]
+        return linked + completed
+
+    def _is_known_page(self, nodes, history):
+        """True nếu `nodes` khác rỗng và chỉ chứa các media đã có trong lịch sử."""
+        if history is None or not nodes:
+            return False
+        keys = {media_key(photo.url) for photo in self.EXTRACTOR.extract(nodes, count=False)[0]}
+        return bool(keys) and len(history.known(keys)) == len(keys)
+
+    def _visit_in_tabs(self, urls, extract, max_tabs=None, timeout=None):
+        """
+        Mở các URL trong tối đa `max_tabs` tab song song (dùng chung cookie phiên) và gọi
+        extract(url, timeout) trên từng tab. Kết quả giữ đúng thứ tự của `urls`;
+        URL bị lỗi hoặc quá thời gian chỉ nhận None mà không làm dừng các URL khác.
+        """
+        max_tabs = max_tabs or self.HTML_FALLBACK_TABS
+        timeout = timeout or self.WAIT_TIMEOUTS["element"]
+        results = [None] * len(urls)
+        main_handle = self.driver.current_window_handle
+        for start in range(0, len(urls), max_tabs):
+            tabs = []
+            for index in range(start, min(start + max_tabs, len(urls))):
                 try:
-                    urlretrieve(image_url, filepath)
-                    with open(history_file, "a") as f:
-                        f.write(f"{post_url},{filename}\n")
+                    self.driver.switch_to.new_window('tab')
+                    self._apply_blocking_profile(self.driver)
+                    # Gán location bằng JS để không chặn chờ trang tải: các tab tải đồng thời.
+                    self.driver.execute_script("window.location.href = arguments[0];", urls[index])
+                    tabs.append((index, self.driver.current_window_handle))
                 except Exception as e:
-                    print(f"Lỗi khi tải {image_url}: {e}")
+                    print(f"Lỗi khi mở tab cho liên kết {urls[index]}: {e}")
+            for index, handle in tabs:
+                try:
+                    self.driver.switch_to.window(handle)
+                    results[index] = extract(urls[index], timeout)
+                except Exception as e:
+                    print(f"Lỗi khi trích xuất hình ảnh từ liên kết {urls[index]}: {e}")
+                finally:
+                    try:
+                        self.driver.close()
+                    except Exception:
+                        pass
+            self.driver.switch_to.window(main_handle)
+        return results
+
+    def _collect_pages(self, api_replay=False, history=None, checkpoint=None):
+        """
+        Thu thập tất cả các trang bài đăng. Ở chế độ api_replay, trình duyệt chỉ dùng để
+        bắt truy vấn phân trang đầu tiên; các trang còn lại được lấy qua HTTP thuần.
+        Nếu có `history` (chế độ tăng dần), dừng ngay khi gặp một trang toàn media đã tải.
+        Nếu có `checkpoint`, mỗi trang được lưu ngay khi thu thập và một lần cào bị gián đoạn
+        được tiếp tục từ con trỏ cuối cùng của nó.
+        """
+        with self.timings.phase("collect"):
+            if checkpoint is None:
+                yield from self._collect_all_pages(api_replay, history)
+            else:
+                yield from self._collect_with_checkpoint(api_replay, history, checkpoint)
+        self.timings.add("collect", nodes=len(self.collector.nodes))
 
-        with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [executor.submit(download_and_record, photo) for photo in set(new_photos)]
-            for _ in tqdm(as_completed(futures), total=len(futures), desc="Tải xuống", unit="tệp"):
-                pass
+    def _collect_with_checkpoint(self, api_replay, history, checkpoint):
+        resumed = bool(checkpoint.pages)
+        self.collector.attach(checkpoint)
+        try:
+            if checkpoint.complete:
+                yield self._yield_event("status", {"message": f"Đã thu thập đủ {len(self.collector.nodes)} bài đăng ở lần chạy trước, chuyển sang tải xuống."})
+                return
+            if resumed:
+                self.timings.add("collect", resumed_nodes=len(self.collector.nodes))
+                yield self._yield_event("status", {"message": f"Tiếp tục từ điểm lưu ({len(self.collector.nodes)} bài đăng đã thu thập)..."})
+                finished = yield from self._resume_pages(history)
+            else:
+                finished = yield from self._collect_all_pages(api_replay, history)
+            if finished:
+                checkpoint.mark_complete()
+        finally:
+            self.collector.attach(None)
 
-    def _scroll_to_bottom(self):
-        """Cuộn xuống cuối trang."""
-        last_height = self.driver.execute_script("return document.body.scrollHeight")
+    def _has_pagination_template(self):
+        """
+        True nếu đã bắt được yêu cầu mẫu của truy vấn phân trang hiện tại. Không dùng
+        capture.templates chung: truy vấn hồ sơ (ví dụ PolarisProfilePageContentQuery) được bắt trước.
+        """
+        last_page = self.collector.last_page
+        return bool(last_page) and last_page[0] in self.capture.templates
+
+    def _collect_all_pages(self, api_replay, history):
+        """Trả về False nếu việc thu thập bị gián đoạn trước khi hết trang."""
+        if api_replay:
+            if not self._has_pagination_template():
+                # Cuộn một lần để trình duyệt gửi truy vấn phân trang làm mẫu.
+                found = len(self._get_all_nodes())
+                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+                self._wait_for_new_nodes(found)
+            if self._is_known_page(self.collector.nodes, history):
+                yield self._yield_event("status", {"message": "Không có bài đăng mới."})
+                return True
+            if self._has_pagination_template():
+                return (yield from self._replay_pages(history))
+            yield self._yield_event("status", {"message": "Không bắt được truy vấn mẫu, chuyển sang cuộn trang..."})
+        yield from self._scroll_to_bottom(history)
+        return True
+
+    def _resume_pages(self, history=None):
+        """
+        Tiếp tục từ trang cuối cùng của checkpoint bằng cách phát lại truy vấn phân trang với
+        con trỏ đã lưu. Vị trí cuộn của trình duyệt không khôi phục được (cuộn vô hạn phải tải
+        lại từng trang), nên chỉ khi không bắt được truy vấn mẫu mới cuộn lại từ đầu.
+        """
+        name, page_info = self.collector.last_page
+        if not page_info.get('has_next_page'):
+            return True
+        if name not in self.capture.templates:
+            # Cuộn một lần để bắt truy vấn phân trang làm mẫu.
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            wait_until(lambda: name in self.capture.templates, self.WAIT_TIMEOUTS["scroll"])
+        # Các trang trình duyệt vừa tải lại đã có trong checkpoint.
+        self.capture.drain()
+        if name in self.capture.templates:
+            return (yield from self._replay_pages(history))
+        yield self._yield_event("status", {"message": "Không bắt được truy vấn mẫu, cuộn lại trang từ đầu..."})
+        yield from self._scroll_to_bottom(history)
+        return True
+
+    def _replay_pages(self, history=None):
+        """
+        Phát lại truy vấn phân trang theo page_info/end_cursor, đưa kết quả vào bộ thu thập.
+        Trả về False nếu bị gián đoạn trước trang cuối.
+        """
+        name, page_info = self.collector.last_page
+        if not page_info.get('has_next_page'):
+            return True
+        template = self.capture.templates[name]
+        replayer = GraphQLReplayer(self.driver.get_cookies())
+        try:
+            pages = replayer.pages(name, template, page_info.get('end_cursor'),
+                                   self.PAGINATION_CURSOR_VARIABLE, self._get_connection)
+            for page_name, data in pages:
+                new_nodes = self.collector.feed(page_name, data)
+                self.timings.add("replay", pages=1)
+                yield self._yield_event("progress", {"found": len(self.collector.nodes)})
+                if self._is_known_page(new_nodes, history):
+                    yield self._yield_event("status", {"message": "Đã gặp các bài đăng đã tải, dừng sớm."})
+                    break
+        except Exception as e:
+            yield self._yield_event("status", {"message": f"Phát lại GraphQL bị gián đoạn: {e}"})
+            return False
+        finally:
+            replayer.close()
+        return True
+
+    def _scroll_to_bottom(self, history=None):
+        """
+        Cuộn xuống cuối trang, chờ từng trang dữ liệu mới thay vì ngủ cố định.
+        Nếu có `history`, dừng khi các nút mới chỉ chứa media đã tải.
+        """
+        height_script = "return document.body.scrollHeight"
+        last_height = self.driver.execute_script(height_script)
+        retries = 0
+        checked = 0
         while True:
+            found = len(self._get_all_nodes())
+            if self._is_known_page(self.collector.nodes[checked:found], history):
+                yield self._yield_event("status", {"message": "Đã gặp các bài đăng đã tải, dừng sớm."})
+                break
+            checked = found
+            # Mỗi lần cuộn kéo theo một truy vấn GraphQL: chờ lượt của bộ giới hạn tốc độ.
+            RATE_LIMITER.acquire('graphql')
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            wait_until(
+                lambda: len(self._get_all_nodes()) > found or self.driver.execute_script(height_script) != last_height,
+                self.WAIT_TIMEOUTS["scroll"],
+            )
             all_nodes = self._get_all_nodes()
             yield self._yield_event("progress", {"found": len(all_nodes)})
-            new_height = self.driver.execute_script("return document.body.scrollHeight")
-            if new_height == last_height:
-                break
+            new_height = self.driver.execute_script(height_script)
+            if new_height == last_height and len(all_nodes) == found:
+                retries += 1
+                if retries >= self.SCROLL_RETRIES:
+                    break
+            else:
+                retries = 0
             last_height = new_height
         self.driver.execute_script("window.scrollTo(0, 0);")  
-
-        if not self._waiting_for_page_load():
-            time.sleep(5)
-            yield from self._scroll_to_bottom()
+        self._wait_for_page_load()
 
     def close(self):
         """Đóng WebDriver."""
+        self._refresh_saved_cookies()
+        self.downloader.close()
+        self.blobs.close()
         self.driver.quit()
+        if self.profile is not None:
+            self.profile.release()
 
     def _get_all_nodes(self):
-        raise NotImplementedError
\ No newline at end of file
+        """Trả về tất cả các nút đã thu thập, chỉ giải mã các phản hồi mới."""
+        started = time.perf_counter()
+        items = self.capture.drain()
+        new_nodes = self.collector.update(items)
+        if items:
+            self.timings.add("decode", time.perf_counter() - started, responses=len(items), nodes=len(new_nodes))
+        return self.collector.nodes
+
+    def _get_connection(self, name, data):
+        """Trả về connection (dict có 'edges') trong payload của truy vấn `name`."""
+        return self.EXTRACTOR.connection(data)
+
+    def _extract_info_nodes(self, all_nodes):
+        """Trích xuất các MediaItem từ các nút đã thu thập theo EXTRACTOR của nền tảng."""
+        photos, malformed = self.EXTRACTOR.extract(all_nodes)
+        if malformed:
+            print(f"Bỏ qua {malformed} nút {self.PLATFORM} không đúng cấu trúc.")
+            self.timings.add("extract", malformed=malformed)
+        return photos
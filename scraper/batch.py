@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import queue
+import importlib
+import multiprocessing
+
+# Lớp trình cào của mỗi nền tảng (tên thuộc tính trong gói scraper).
+SCRAPER_CLASSES = {'instagram': 'InstagramScraper', 'threads': 'ThreadsScraper', 'facebook': 'FacebookScraper'}
+
+
+def _scraper_class(platform):
+    return getattr(importlib.import_module('scraper'), SCRAPER_CLASSES[platform])
+
+
+def parse_accounts(lines):
+    """
+    Đọc các dòng 'platform:username' (bỏ dòng trống và dòng bắt đầu bằng #).
+    Trả về (danh sách (platform, username), danh sách lỗi).
+    """
+    accounts, errors = [], []
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        platform, _, username = line.partition(':')
+        platform, username = platform.strip().lower(), username.strip()
+        if platform not in SCRAPER_CLASSES or not username:
+            errors.append(f"Dòng {number} không hợp lệ: {line!r} (cần dạng platform:username)")
+            continue
+        accounts.append((platform, username))
+    return accounts, errors
+
+
+def missing_cookies(platforms):
+    """Các nền tảng chưa có tệp cookie, để dừng ngay thay vì hỏi đăng nhập trong tiến trình con."""
+    return sorted(platform for platform in set(platforms) if not _scraper_class(platform).has_cookies())
+
+
+def _event_line(platform, username, event_type, data):
+    return json.dumps({"platform": platform, "username": username, "type": event_type, "data": data},
+                      ensure_ascii=False)
+
+
+def _worker(tasks, results, options):
+    """Tiến trình con: giữ một trình cào (một trình duyệt) cho mỗi nền tảng và xử lý lần lượt các tài khoản."""
+    from .base import LoginRequiredError
+    scrapers = {}
+    failed_platforms = {}
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            platform, username = task
+            if platform in failed_platforms:
+                results.put(_event_line(platform, username, "error", {"message": failed_platforms[platform]}))
+                continue
+            try:
+                if platform not in scrapers:
+                    scrapers[platform] = _scraper_class(platform)(
+                        headless=options['headless'], working_dir=options['working_dir'],
+                        download_workers=options['download_workers'], interactive=False)
+                events = scrapers[platform].scrape_user(
+                    username, api_replay=options['api_replay'], incremental=options['incremental'])
+                for event in events:
+                    # Giữ nguyên payload của _yield_event, thêm nền tảng và người dùng.
+                    results.put(json.dumps({"platform": platform, "username": username, **json.loads(event)},
+                                           ensure_ascii=False))
+            except LoginRequiredError as e:
+                failed_platforms[platform] = str(e)
+                results.put(_event_line(platform, username, "error", {"message": str(e)}))
+            except Exception as e:
+                results.put(_event_line(platform, username, "error", {"message": f"{type(e).__name__}: {e}"}))
+    finally:
+        for scraper in scrapers.values():
+            try:
+                scraper.close()
+            except Exception:
+                pass
+        results.put(None)
+
+
+def run_batch(accounts, output, workers, options):
+    """
+    Chia các tài khoản cho `workers` tiến trình (mỗi tiến trình có trình duyệt riêng) qua một
+    hàng đợi chung, ghi mỗi sự kiện thành một dòng JSON vào `output`.
+    Trả về số tài khoản có sự kiện lỗi.
+    """
+    workers = max(1, min(workers, len(accounts)))
+    # Các tiến trình con dùng chung giới hạn tốc độ qua tệp trạng thái (xem scraper.ratelimit).
+    os.environ.setdefault('SCRAPER_RATE_LIMIT_DIR', os.path.join(options['working_dir'], '.ratelimit'))
+    # spawn: mỗi tiến trình con khởi tạo selenium-wire/Chrome của riêng nó.
+    context = multiprocessing.get_context('spawn')
+    tasks, results = context.Queue(), context.Queue()
+    for account in accounts:
+        tasks.put(account)
+    for _ in range(workers):
+        tasks.put(None)
+    processes = [context.Process(target=_worker, args=(tasks, results, options), name=f"scraper-worker-{index}")
+                 for index in range(workers)]
+    for process in processes:
+        process.start()
+
+    failed = set()
+    finished = 0
+    try:
+        while finished < workers:
+            try:
+                line = results.get(timeout=1)
+            except queue.Empty:
+                if not any(process.is_alive() for process in processes):
+                    # Tiến trình con chết bất thường (không kịp gửi tín hiệu kết thúc).
+                    break
+                continue
+            if line is None:
+                finished += 1
+                continue
+            output.write(line + '\n')
+            output.flush()
+            event = json.loads(line)
+            if event["type"] == "error":
+                failed.add((event["platform"], event["username"]))
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+    lost = [process.name for process in processes if process.exitcode not in (0, None)]
+    if lost:
+        print(f"Tiến trình kết thúc bất thường: {', '.join(lost)}", file=sys.stderr)
+    return len(failed)
@@ -0,0 +1,93 @@
+import os
+import time
+import shutil
+import sqlite3
+import hashlib
+import threading
+
+
+class BlobStore:
+    """
+    Kho media định địa chỉ theo nội dung (sha256). Mỗi nội dung chỉ được lưu một lần trong
+    `.blobs/`; thư mục người dùng và thư mục nhãn tham chiếu tới blob bằng hard link, nên
+    di chuyển/xóa một tệp trong thư viện không ảnh hưởng tới các tham chiếu khác.
+    Chỉ mục media_key -> sha256 cho phép bỏ qua việc tải những media đã có trong kho.
+    """
+    DIRNAME = ".blobs"
+    INDEX_FILENAME = "index.sqlite"
+    # Tệp .part không được tiếp tục sau khoảng thời gian này (giây) bị xóa.
+    PART_MAX_AGE = 7 * 24 * 3600
+
+    def __init__(self, working_dir):
+        self.root = os.path.join(working_dir, self.DIRNAME)
+        self.tmp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(self.tmp_dir, exist_ok=True)
+        self._remove_stale_parts()
+        # Kết nối được dùng chung giữa các luồng của pool trình duyệt nên cần khóa.
+        self._conn = sqlite3.connect(os.path.join(self.root, self.INDEX_FILENAME), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._lock = threading.Lock()
+        with self._conn:
+            self._conn.execute("CREATE TABLE IF NOT EXISTS blobs (media_key TEXT PRIMARY KEY, digest TEXT NOT NULL)")
+
+    def path(self, digest):
+        return os.path.join(self.root, digest[:2], digest[2:])
+
+    def _remove_stale_parts(self):
+        cutoff = time.time() - self.PART_MAX_AGE
+        with os.scandir(self.tmp_dir) as it:
+            for entry in it:
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    pass
+
+    def part_path(self, name):
+        """
+        Đường dẫn tệp .part (cùng ổ đĩa với kho) cho một lượt tải. Tên cố định theo `name`
+        nên lượt tải bị gián đoạn có thể được tiếp tục ở lần sau.
+        """
+        return os.path.join(self.tmp_dir, hashlib.sha1(name.encode('utf-8')).hexdigest() + '.part')
+
+    def commit(self, tmp_path, digest):
+        """Đưa tệp tạm vào kho dưới tên `digest`; nếu nội dung đã có thì bỏ tệp tạm."""
+        blob_path = self.path(digest)
+        if os.path.exists(blob_path):
+            os.remove(tmp_path)
+            return blob_path
+        os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+        os.replace(tmp_path, blob_path)
+        return blob_path
+
+    def link(self, digest, dest_path):
+        """Tạo tham chiếu tới blob tại `dest_path` (hard link, sao chép nếu hệ thống tệp không hỗ trợ)."""
+        blob_path = self.path(digest)
+        try:
+            os.link(blob_path, dest_path)
+        except FileExistsError:
+            pass
+        except OSError:
+            shutil.copy2(blob_path, dest_path)
+
+    def lookup(self, keys):
+        """Trả về {media_key: digest} cho các media đã có blob trong kho."""
+        keys = list(set(keys))
+        found = {}
+        with self._lock:
+            # Giới hạn số tham số của SQLite cho mỗi truy vấn.
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ", ".join("?" * len(chunk))
+                rows = self._conn.execute(f"SELECT media_key, digest FROM blobs WHERE media_key IN ({placeholders})", chunk)
+                found.update(rows)
+        # Blob có thể đã bị xóa thủ công khỏi đĩa.
+        return {key: digest for key, digest in found.items() if os.path.exists(self.path(digest))}
+
+    def add(self, key, digest):
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO blobs (media_key, digest) VALUES (?, ?)", (key, digest))
+
+    def close(self):
+        self._conn.close()
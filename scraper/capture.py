@@ -0,0 +1,83 @@
+import tempfile
+import threading
+from collections import deque, namedtuple
+from seleniumwire.utils import decode
+from .ratelimit import RATE_LIMITER, parse_retry_after
+
+# Mẫu của một yêu cầu GraphQL đã bắt được (dùng để phát lại ở chế độ API).
+RequestTemplate = namedtuple('RequestTemplate', ['method', 'url', 'headers', 'body'])
+
+
+class CaptureBuffer:
+    """
+    Bắt phản hồi GraphQL qua response_interceptor của selenium-wire. Chỉ các truy vấn có
+    x-fb-friendly-name cần thiết được giải mã và giữ lại trong một hàng đợi có giới hạn;
+    khi hàng đợi đầy, phần dư được ghi tạm ra đĩa (spill file) theo đúng thứ tự.
+    Mọi phản hồi khác bị bỏ qua ngay nên bộ nhớ không tăng theo độ dài hồ sơ.
+    """
+    def __init__(self, queries, max_items=32):
+        self.queries = set(queries)
+        self.max_items = max_items
+        # Yêu cầu gần nhất của mỗi truy vấn, dùng làm mẫu để phát lại.
+        self.templates = {}
+        self._queue = deque()
+        self._spill = None
+        self._spilled = 0
+        self._lock = threading.Lock()
+
+    def intercept(self, request, response):
+        """Hàm response_interceptor: chạy trong luồng proxy cho mỗi phản hồi nằm trong scopes."""
+        # Lưu lượng của trình duyệt cũng điều chỉnh tốc độ dùng chung (429, chuyển hướng kiểm tra...).
+        host_class = RATE_LIMITER.classify(request.url)
+        if RATE_LIMITER.feedback(host_class, response.status_code, response.headers.get('Location'),
+                                 parse_retry_after(response.headers.get('Retry-After'))):
+            print(f"Bị giới hạn tốc độ ({response.status_code}) tại {request.url}")
+        name = request.headers.get('x-fb-friendly-name')
+        if name not in self.queries:
+            return
+        body = decode(response.body, response.headers.get('Content-Encoding', 'identity'))
+        template = RequestTemplate(request.method, request.url, dict(request.headers), request.body)
+        with self._lock:
+            self.templates[name] = template
+            # Khi đã có dữ liệu trên đĩa, tiếp tục ghi ra đĩa để giữ thứ tự.
+            if self._spilled or len(self._queue) >= self.max_items:
+                self._spill_item(name, body)
+            else:
+                self._queue.append((name, body))
+
+    def drain(self):
+        """Lấy ra tất cả phản hồi đã bắt (name, body) theo thứ tự nhận được."""
+        with self._lock:
+            items = list(self._queue)
+            self._queue.clear()
+            if self._spilled:
+                # Các mục trên đĩa luôn đến sau các mục trong hàng đợi.
+                items.extend(self._read_spill())
+        return items
+
+    def reset(self):
+        with self._lock:
+            self.templates = {}
+            self._queue.clear()
+            if self._spill is not None:
+                self._spill.close()
+                self._spill = None
+            self._spilled = 0
+
+    def _spill_item(self, name, body):
+        if self._spill is None:
+            self._spill = tempfile.TemporaryFile(prefix="capture-")
+        self._spill.write(f"{name}\t{len(body)}\n".encode('utf-8'))
+        self._spill.write(body)
+        self._spilled += 1
+
+    def _read_spill(self):
+        items = []
+        self._spill.seek(0)
+        for _ in range(self._spilled):
+            name, size = self._spill.readline().decode('utf-8').rstrip('\n').split('\t')
+            items.append((name, self._spill.read(int(size))))
+        self._spill.seek(0)
+        self._spill.truncate()
+        self._spilled = 0
+        return items
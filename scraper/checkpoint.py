@@ -0,0 +1,92 @@
+import os
+import json
+import time
+from .extract import loads
+
+
+class Checkpoint:
+    """
+    Điểm lưu tiến trình thu thập của một người dùng (checkpoint.jsonl trong thư mục người dùng).
+    Mỗi trang GraphQL đã giải mã được ghi thêm thành một dòng ngay khi thu thập; nếu trình
+    duyệt hoặc tiến trình dừng giữa chừng, lần cào sau tiếp tục từ con trỏ phân trang cuối
+    cùng thay vì cuộn lại từ đầu. Media đã tải được ghi nhận riêng trong HistoryStore.
+    """
+    FILENAME = "checkpoint.jsonl"
+
+    def __init__(self, user_folder, max_age=None):
+        os.makedirs(user_folder, exist_ok=True)
+        self.path = os.path.join(user_folder, self.FILENAME)
+        # Các trang đã lưu: (tên truy vấn, edges, page_info).
+        self.pages = []
+        # True khi đã thu thập hết các trang (chỉ còn bước tải xuống).
+        self.complete = False
+        self._file = None
+        self._load(max_age)
+
+    def _load(self, max_age):
+        if not os.path.exists(self.path):
+            return
+        if max_age is not None and time.time() - os.path.getmtime(self.path) > max_age:
+            # Con trỏ phân trang cũ thường đã hết hạn: bắt đầu lại từ đầu.
+            os.remove(self.path)
+            return
+        valid = 0
+        with open(self.path, 'rb+') as f:
+            for line in f:
+                try:
+                    record = loads(line)
+                except ValueError:
+                    # Dòng cuối bị cắt ngang khi tiến trình dừng đột ngột: bỏ đi để ghi tiếp từ đó.
+                    f.truncate(valid)
+                    break
+                valid += len(line)
+                if 'page' in record:
+                    self.pages.append((record['page'], record['edges'], record['page_info']))
+                elif record.get('complete'):
+                    self.complete = True
+
+    @property
+    def nodes(self):
+        return [edge for _, edges, _ in self.pages for edge in edges]
+
+    @property
+    def last_page(self):
+        """(tên truy vấn, page_info) của trang cuối cùng đã lưu, hoặc None."""
+        if not self.pages:
+            return None
+        name, _, page_info = self.pages[-1]
+        return name, page_info
+
+    def add_page(self, name, edges, page_info):
+        self.pages.append((name, edges, page_info))
+        self._write({'page': name, 'edges': edges, 'page_info': page_info})
+
+    def mark_complete(self):
+        self.complete = True
+        self._write({'complete': True})
+
+    def _write(self, record):
+        if self._file is None:
+            self._file = open(self.path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        # Ghi ngay ra hệ điều hành để dữ liệu còn lại khi tiến trình bị dừng.
+        self._file.flush()
+
+    def clear(self):
+        """Xóa điểm lưu sau khi cào xong trọn vẹn."""
+        self.close()
+        self.pages = []
+        self.complete = False
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -0,0 +1,73 @@
+from .extract import loads
+
+
+class NodeCollector:
+    """
+    Thu thập tăng dần các nút từ lưu lượng GraphQL đã bắt được.
+
+    Mỗi phản hồi chỉ được giải mã đúng một lần; các cạnh (edges) được nối vào
+    một kho chạy liên tục để tiến trình, trích xuất cuối cùng và dữ liệu hồ sơ
+    đều đọc từ cùng một nơi.
+    """
+    def __init__(self, queries, get_connection):
+        # queries: tập các x-fb-friendly-name chứa danh sách bài đăng.
+        # get_connection(name, data): trả về dict connection có khóa 'edges'.
+        self.queries = set(queries)
+        self.get_connection = get_connection
+        # Checkpoint nhận mỗi trang mới (xem attach()).
+        self.checkpoint = None
+        self.reset()
+
+    def reset(self):
+        """Xóa kho nút (gọi khi bộ đệm bắt gói bị xóa)."""
+        self.nodes = []
+        self.payloads = {}
+        # (tên truy vấn, page_info) của trang gần nhất đã thu thập.
+        self.last_page = None
+
+    def attach(self, checkpoint):
+        """
+        Ghi các trang tiếp theo vào `checkpoint` (None để ngừng ghi). Nếu checkpoint đã có
+        dữ liệu từ lần chạy trước, kho nút được khôi phục từ đó (thay cho trang đầu vừa tải
+        lại); nếu chưa, các nút đã thu thập được lưu thành trang đầu tiên.
+        """
+        self.checkpoint = checkpoint
+        if checkpoint is None:
+            return
+        if checkpoint.pages:
+            self.nodes = checkpoint.nodes
+            self.last_page = checkpoint.last_page
+        elif self.last_page:
+            checkpoint.add_page(self.last_page[0], list(self.nodes), self.last_page[1])
+
+    def watch(self, name):
+        """Giữ lại phản hồi đầu tiên của một truy vấn không phân trang (ví dụ: hồ sơ)."""
+        self.payloads.setdefault(name, None)
+
+    def update(self, items):
+        """Giải mã các phản hồi mới (name, body) lấy từ bộ đệm bắt gói và trả về các nút mới."""
+        new_nodes = []
+        for name, body in items:
+            if name not in self.queries and name not in self.payloads:
+                continue
+            try:
+                data = loads(body)
+            except ValueError as e:
+                print(f"Bỏ qua phản hồi {name} không hợp lệ: {e}")
+                continue
+            new_nodes.extend(self.feed(name, data))
+        return new_nodes
+
+    def feed(self, name, data):
+        """Đưa một payload đã giải mã vào kho và trả về các nút mới."""
+        if name in self.payloads and self.payloads[name] is None:
+            self.payloads[name] = data
+        if name not in self.queries:
+            return []
+        connection = self.get_connection(name, data)
+        edges = connection['edges']
+        self.nodes.extend(edges)
+        self.last_page = (name, connection.get('page_info') or {})
+        if self.checkpoint is not None:
+            self.checkpoint.add_page(name, edges, self.last_page[1])
+        return edges
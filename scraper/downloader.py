@@ -0,0 +1,204 @@
+import os
+import time
+import queue
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+from .metrics import DOWNLOADS_QUEUED
+from .ratelimit import RATE_LIMITER
+
+# Hậu tố của tệp đang tải khi không dùng kho blob; tệp chỉ được đổi tên khi đã tải đủ.
+PART_SUFFIX = ".part"
+
+
+class IncompleteDownload(IOError):
+    """Kết nối kết thúc trước khi nhận đủ số byte máy chủ đã báo."""
+
+
+class DownloadCancelled(Exception):
+    """Người dùng dừng giữa chừng (generator của download() bị đóng)."""
+
+
+# Lỗi giữa chừng có thể tiếp tục ở lần sau (tệp .part được giữ lại).
+RESUMABLE_ERRORS = (IncompleteDownload, DownloadCancelled, requests.ConnectionError, requests.Timeout,
+                    requests.exceptions.ChunkedEncodingError)
+
+
+class Downloader:
+    """
+    Trình tải xuống dùng kết nối keep-alive theo từng host CDN và ghi dữ liệu
+    xuống đĩa theo từng khối, báo cáo tiến trình qua một hàng đợi sự kiện.
+    Dữ liệu được băm sha256 trong lúc tải; nếu có `blobs` (BlobStore), tệp được lưu
+    vào kho blob và đích chỉ là một hard link tới blob.
+    Mọi yêu cầu đi qua `limiter` (mặc định: bộ giới hạn tốc độ dùng chung của tiến trình).
+    """
+    def __init__(self, workers=10, chunk_size=64 * 1024, timeout=30, report_interval=0.5, blobs=None, limiter=None):
+        self.blobs = blobs
+        self.limiter = limiter or RATE_LIMITER
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.timeout = timeout
+        self.report_interval = report_interval
+        self.session = requests.Session()
+        # Mỗi host CDN có một pool riêng, đủ lớn cho tất cả các luồng.
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def download(self, jobs):
+        """
+        Tải xuống danh sách (url, filepath, context) và sinh ra các sự kiện dạng dict:
+        - {'kind': 'file', ...}  khi một tệp hoàn tất hoặc lỗi,
+        - {'kind': 'tick', ...}  định kỳ với tốc độ tổng hợp.
+        """
+        events = queue.Queue()
+        stop = threading.Event()
+        total = len(jobs)
+        state = {"bytes": 0, "completed": 0, "failed": 0}
+        started = time.monotonic()
+
+        def aggregate():
+            elapsed = max(time.monotonic() - started, 1e-6)
+            return {
+                "completed": state["completed"],
+                "failed": state["failed"],
+                "total": total,
+                "bytes": state["bytes"],
+                "rate": state["bytes"] / elapsed,
+            }
+
+        finished = 0
+        DOWNLOADS_QUEUED.inc(total)
+        executor = ThreadPoolExecutor(max_workers=self.workers)
+        try:
+            for job in jobs:
+                executor.submit(self._worker, job, events, stop)
+
+            last_report = started
+            while finished < total:
+                try:
+                    kind, payload = events.get(timeout=self.report_interval)
+                except queue.Empty:
+                    kind, payload = None, None
+
+                if kind == "chunk":
+                    state["bytes"] += payload
+                elif kind == "file":
+                    finished += 1
+                    DOWNLOADS_QUEUED.dec()
+                    if payload["error"]:
+                        state["failed"] += 1
+                    else:
+                        state["completed"] += 1
+                    yield {"kind": "file", "file": payload, **aggregate()}
+                    last_report = time.monotonic()
+
+                now = time.monotonic()
+                if now - last_report >= self.report_interval and finished < total:
+                    last_report = now
+                    yield {"kind": "tick", **aggregate()}
+        finally:
+            # Người dùng có thể dừng giữa chừng (đóng generator): không chờ các tệp còn lại.
+            # Tệp chưa bắt đầu bị hủy, tệp đang tải dừng ở khối kế tiếp và giữ lại .part, nên
+            # không có tệp nào hoàn tất mà không được nơi gọi ghi nhận (lịch sử, kho blob).
+            stop.set()
+            executor.shutdown(wait=False, cancel_futures=True)
+            DOWNLOADS_QUEUED.dec(total - finished)
+
+    def _part_path(self, filepath):
+        return self.blobs.part_path(filepath) if self.blobs else filepath + PART_SUFFIX
+
+    def _request(self, url, offset):
+        """GET `url`, tiếp tục từ byte `offset` nếu máy chủ hỗ trợ Range. Trả về (response, offset thực tế)."""
+        headers = {"Range": f"bytes={offset}-"} if offset else None
+        response = self.limiter.request(self.session, 'GET', url, stream=True, timeout=self.timeout, headers=headers)
+        if not offset:
+            return response, 0
+        if response.status_code == 206 and response.headers.get("Content-Range", "").startswith(f"bytes {offset}-"):
+            return response, offset
+        if response.status_code == 200:
+            # Máy chủ bỏ qua Range: phản hồi là toàn bộ tệp, ghi lại từ đầu.
+            return response, 0
+        if response.status_code not in (206, 416):
+            # Lỗi HTTP: raise_for_status() của nơi gọi sẽ báo lỗi.
+            return response, offset
+        # Phần đã tải không khớp với tệp trên máy chủ: tải lại từ đầu.
+        response.close()
+        return self._request(url, 0)
+
+    @staticmethod
+    def _expected_size(response, offset):
+        """Tổng kích thước tệp theo Content-Range/Content-Length, hoặc None nếu không biết."""
+        content_range = response.headers.get("Content-Range", "")
+        if "/" in content_range and not content_range.endswith("/*"):
+            return int(content_range.rsplit("/", 1)[1])
+        # Content-Length của phản hồi nén không phải kích thước sau khi giải nén.
+        if "Content-Length" in response.headers and response.headers.get("Content-Encoding", "identity") == "identity":
+            return offset + int(response.headers["Content-Length"])
+        return None
+
+    def _worker(self, job, events, stop):
+        url, filepath, context = job
+        if stop.is_set():
+            return
+        started = time.monotonic()
+        part_path = self._part_path(filepath)
+        offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        size = 0
+        digest = None
+        error = None
+        try:
+            response, offset = self._request(url, offset)
+            with response:
+                response.raise_for_status()
+                expected = self._expected_size(response, offset)
+                sha256 = hashlib.sha256()
+                if offset:
+                    # Băm phần đã tải ở lần trước để digest là của toàn bộ tệp.
+                    with open(part_path, "rb") as f:
+                        for chunk in iter(lambda: f.read(self.chunk_size), b""):
+                            sha256.update(chunk)
+                size = offset
+                # Ghi từng khối thẳng xuống đĩa: video và media lớn không bị giữ trong bộ nhớ.
+                with open(part_path, "ab" if offset else "wb") as f:
+                    for chunk in response.iter_content(chunk_size=self.chunk_size):
+                        if stop.is_set():
+                            raise DownloadCancelled("Đã dừng tải xuống.")
+                        f.write(chunk)
+                        sha256.update(chunk)
+                        size += len(chunk)
+                        events.put(("chunk", len(chunk)))
+            if stop.is_set():
+                # Đã tải đủ nhưng nơi gọi không còn nhận kết quả: giữ .part, lần sau chỉ cần hoàn tất.
+                raise DownloadCancelled("Đã dừng tải xuống.")
+            if expected is not None and size != expected:
+                raise IncompleteDownload(f"Tải thiếu: {size}/{expected} byte")
+            digest = sha256.hexdigest()
+            if self.blobs:
+                self.blobs.commit(part_path, digest)
+                self.blobs.link(digest, filepath)
+            else:
+                os.replace(part_path, filepath)
+        except RESUMABLE_ERRORS as e:
+            # Giữ tệp .part: lần tải sau tiếp tục bằng Range thay vì tải lại từ đầu.
+            error = str(e)
+        except Exception as e:
+            error = str(e)
+            if os.path.exists(part_path):
+                os.remove(part_path)
+        elapsed = max(time.monotonic() - started, 1e-6)
+        events.put(("file", {
+            "url": url,
+            "name": os.path.basename(filepath),
+            "bytes": size,
+            "resumed": offset,
+            "rate": (size - offset) / elapsed,
+            "digest": digest if error is None else None,
+            "error": error,
+            "context": context,
+        }))
+
+    def close(self):
+        self.session.close()
@@ -0,0 +1,181 @@
+import json
+from collections import namedtuple
+from .metrics import REGISTRY
+
+try:
+    # orjson giải mã nhanh hơn nhiều so với json của thư viện chuẩn; không bắt buộc.
+    import orjson
+    loads = orjson.loads
+except ImportError:
+    loads = json.loads
+
+# Một media (ảnh/video) đã trích xuất. Là namedtuple nên không có __dict__ cho mỗi bản ghi.
+MediaItem = namedtuple('MediaItem', ['url', 'post_url', 'taken_at', 'media_id', 'width', 'height', 'media_type'],
+                       defaults=(None, None, None, None))
+
+MALFORMED_NODES = REGISTRY.counter(
+    "scraper_malformed_nodes_total", "Số nút GraphQL không đúng cấu trúc mong đợi.", ("platform",))
+
+# Lỗi khi một nút thiếu trường bắt buộc hoặc có kiểu khác mong đợi.
+_NODE_ERRORS = (KeyError, IndexError, TypeError, ValueError, AttributeError)
+# Giá trị _iterator sinh ra thay cho một phần tử danh sách sai cấu trúc.
+_MALFORMED = object()
+
+
+def _getter(path):
+    """Biên dịch `path` thành một hàm truy cập (nhanh hơn duyệt tuple mỗi lần gọi)."""
+    if len(path) == 1:
+        key, = path
+        return lambda obj: obj[key]
+    if len(path) == 2:
+        first, second = path
+        return lambda obj: obj[first][second]
+
+    def get(obj):
+        for key in path:
+            obj = obj[key]
+        return obj
+    return get
+
+
+def _optional(path):
+    """Như _getter nhưng trả về None khi thiếu (dùng cho các trường không bắt buộc)."""
+    if path is None:
+        return lambda obj: None
+    if len(path) == 1:
+        key, = path
+        return lambda obj: obj.get(key)
+
+    def lookup(obj):
+        for key in path:
+            if not isinstance(obj, dict):
+                return None
+            obj = obj.get(key)
+        return obj
+    return lookup
+
+
+def _iterator(path):
+    """
+    Hàm sinh các giá trị tại `path`, trong đó '*' lặp qua từng phần tử của một danh sách.
+    Phần tử sai cấu trúc sinh ra _MALFORMED thay vì làm dừng cả vòng lặp.
+    """
+    if '*' not in path:
+        get = _getter(path)
+        return lambda obj: (get(obj),)
+    index = path.index('*')
+    head = _getter(path[:index]) if index else (lambda obj: obj)
+    rest = _iterator(path[index + 1:]) if index + 1 < len(path) else (lambda obj: (obj,))
+
+    def iterate(obj):
+        for item in head(obj) or ():
+            try:
+                values = tuple(rest(item))
+            except _NODE_ERRORS:
+                yield _MALFORMED
+                continue
+            yield from values
+    return iterate
+
+
+class MediaExtractor:
+    """
+    Mô tả khai báo cách lấy media từ các nút GraphQL của một nền tảng. Mọi đường dẫn là
+    tuple các khóa; chỉ các trường được khai báo được đọc, và nút sai cấu trúc được đếm
+    thay vì bị bỏ qua lặng lẽ.
+
+    connection: đường dẫn từ payload tới connection (dict có 'edges' và 'page_info').
+    post: đường dẫn từ một edge tới bài đăng ('*' để lặp qua danh sách).
+    children: đường dẫn từ bài đăng tới danh sách media con (carousel), nếu có.
+    image: đường dẫn từ media tới danh sách ứng viên ảnh hoặc một ảnh duy nhất.
+    url_key: khóa URL trong mỗi ứng viên ảnh.
+    post_url(post, edge): hàm dựng URL bài đăng.
+    media_id, taken_at, media_type: đường dẫn từ media (taken_at lấy từ bài đăng nếu media không có).
+    media_types: ánh xạ giá trị media_type thô sang 'image'/'video'.
+    """
+    def __init__(self, platform, connection, post, image, post_url, url_key='url', children=None,
+                 media_id=('id',), taken_at=('taken_at',), media_type=None, media_types=None):
+        self.platform = platform
+        self.connection_path = connection
+        self.post = post
+        self.children = children
+        self.image = image
+        self.url_key = url_key
+        self.post_url = post_url
+        self.media_id = media_id
+        self.taken_at = taken_at
+        self.media_type = media_type
+        self.media_types = media_types or {}
+        self._connection = _getter(connection)
+        self._posts = _iterator(post)
+        self._children = _optional(children)
+        self._image = _getter(image)
+        self._media_id = _optional(media_id)
+        self._taken_at = _optional(taken_at)
+        self._media_type = _optional(media_type)
+
+    def connection(self, data):
+        return self._connection(data)
+
+    def extract(self, edges, count=True):
+        """
+        Trả về (danh sách MediaItem, số nút sai cấu trúc). count=False không cộng vào
+        scraper_malformed_nodes_total (cho các lần đọc lại cùng nút, ví dụ kiểm tra lịch sử).
+        """
+        items = []
+        append = items.append
+        malformed = 0
+        for edge in edges:
+            try:
+                posts = tuple(self._posts(edge))
+            except _NODE_ERRORS:
+                malformed += 1
+                continue
+            # Kiểm tra lỗi theo từng bài và từng media: một phần tử hỏng không làm mất các phần tử cùng cấp.
+            for post in posts:
+                if post is _MALFORMED:
+                    malformed += 1
+                    continue
+                try:
+                    post_url = self.post_url(post, edge)
+                    medias = self._children(post) or (post,)
+                except _NODE_ERRORS:
+                    malformed += 1
+                    continue
+                for media in medias:
+                    try:
+                        item = self._item(media, post, post_url)
+                    except _NODE_ERRORS:
+                        malformed += 1
+                        continue
+                    if item is not None:
+                        append(item)
+        if malformed and count:
+            MALFORMED_NODES.inc(malformed, platform=self.platform)
+        return items, malformed
+
+    def _item(self, media, post, post_url):
+        best = self._image(media)
+        if not best:
+            # Bài chỉ có chữ (ví dụ bài Threads không có ứng viên ảnh): không phải nút lỗi.
+            return None
+        if not isinstance(best, dict):
+            # Ứng viên lớn nhất; khi không có kích thước thì giữ ứng viên đầu tiên.
+            candidates, best, best_area = best, best[0], -1
+            for candidate in candidates:
+                area = (candidate.get('width') or 0) * (candidate.get('height') or 0)
+                if area > best_area:
+                    best, best_area = candidate, area
+        taken_at = self._taken_at(media)
+        if taken_at is None:
+            taken_at = self._taken_at(post)
+        media_type = self._media_type(media)
+        return MediaItem(
+            best[self.url_key],
+            post_url,
+            taken_at,
+            self._media_id(media),
+            best.get('width'),
+            best.get('height'),
+            self.media_types.get(media_type, media_type),
+        )
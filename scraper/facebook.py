@@ -5,44 +5,64 @@ import re
 import base64
 import argparse
 from selenium.webdriver.common.by import By
-from seleniumwire.utils import decode
 from datetime import datetime
 from .base import BaseScraper
+from .history import HistoryStore
+from .checkpoint import Checkpoint
+from .extract import MediaExtractor, MediaItem
 
 class FacebookScraper(BaseScraper):
     """
     Cào dữ liệu ảnh Facebook cho (các) người dùng được chỉ định.
     """
-    def __init__(self, headless=True, working_dir="CloudStorage"):
-        super().__init__(headless, working_dir)
-        self.driver.get("https://www.facebook.com/")
-
-        if not self._load_cookies("cookies/facebook.pkl"):
-            print("Vui lòng đăng nhập vào Facebook và lưu cookie.")
-            input("Nhấn Enter sau khi đăng nhập...")
-            self._save_cookies("cookies/facebook.pkl")
-
-    def scrape_users(self, users):
+    PLATFORM = "facebook"
+    HOME_URL = "https://www.facebook.com/"
+    CAPTURE_SCOPES = (r'https://www\.facebook\.com/api/graphql/',)
+    COOKIE_FILE = "cookies/facebook.pkl"
+    SESSION_COOKIE = "c_user"
+    GRAPHQL_QUERIES = ('ProfileCometAppCollectionPhotosRendererPaginationQuery',)
+    EXTRACTOR = MediaExtractor(
+        "facebook",
+        connection=('data', 'node', 'pageItems'),
+        post=('node',),
+        image=('node', 'viewer_image'),
+        url_key='uri',
+        post_url=lambda post, edge: post['url'].split('&')[0],
+        media_id=('node', 'id'),
+        taken_at=None,
+        media_type=('node', '__typename'),
+        media_types={'Photo': 'image', 'Video': 'video'},
+    )
+    # Facebook tải chậm hơn, đặc biệt là trang photos_by.
+    PAGINATION_CURSOR_VARIABLE = "cursor"
+    WAIT_TIMEOUTS = {**BaseScraper.WAIT_TIMEOUTS, "page": 20, "scroll": 10}
+    # Video của Facebook đến từ máy chủ riêng, thường không có phần mở rộng trong URL.
+    BLOCKED_URL_PATTERNS = ('*://video*.fbcdn.net/*',)
+
+    def __init__(self, headless=True, working_dir="CloudStorage", download_workers=10, block_resources=True,
+                 interactive=True, profile_root="browser_profiles"):
+        super().__init__(headless, working_dir, download_workers, block_resources, profile_root)
+        self._login(interactive)
+
+    def scrape_users(self, users, api_replay=False, incremental=False):
         """Cào dữ liệu nhiều người dùng Facebook."""
         for user in users:
-            yield from self.scrape_user(user)
+            yield from self.scrape_user(user, api_replay=api_replay, incremental=incremental)
 
-    def scrape_user(self, user):
+    def scrape_user(self, user, api_replay=False, incremental=False):
         if not user: return
+        self.timings.reset()
         yield self._yield_event("status", {"message": f"Đang kết nối tới Facebook cho người dùng: {user}..."})
-        self.driver.get(f"https://www.facebook.com/")
-        if not self._load_cookies("cookies/facebook.pkl"):
+        if not self._ensure_login():
             yield self._yield_event("error", {"message": "Cookie Facebook không tìm thấy. Vui lòng đăng nhập thủ công và lưu lại."})
             return
 
         print(f"Đang cào dữ liệu người dùng Facebook: {user}")
-        self.driver.scopes = ['https://www.facebook.com/api/graphql/*']
         self._clean_driver_requests()
 
-        self.driver.get(f"https://www.facebook.com/{user}/photos_by")
-        time.sleep(5)
-
-        profile_data = self._get_profile_data()
+        with self.timings.phase("profile"):
+            self.driver.get(f"https://www.facebook.com/{user}/photos_by")
+            profile_data = self._get_profile_data()
         if not profile_data:
             yield self._yield_event("error", {"message": f"Không thể tìm thấy hồ sơ cho người dùng {user}."})
             print(f"Không thể truy xuất dữ liệu hồ sơ cho người dùng {user}")
@@ -57,50 +77,56 @@ class FacebookScraper(BaseScraper):
         yield self._yield_event("status", {"message": "Đã tìm thấy hồ sơ. Bắt đầu cuộn trang để thu thập bài đăng..."})
         
 
-        yield from self._scroll_to_bottom()
-
         user_folder = os.path.join(self.working_dir, "facebook", user)
-        os.makedirs(user_folder, exist_ok=True)
-        
-        with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, ensure_ascii=False, indent=4)
-            
-        all_nodes = self._get_all_nodes()
-        
-        photos = self._extract_info_nodes(all_nodes)
-        photos += self._extract_info_nodes_in_html(user)
+        with HistoryStore(user_folder) as history, Checkpoint(user_folder, self.CHECKPOINT_MAX_AGE) as checkpoint:
+            yield from self._collect_pages(api_replay, history if incremental else None, checkpoint)
 
-        yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
-        self._download_files(photos, user_folder, os.path.join(user_folder, "history.txt"))
-        yield self._yield_event("done", {"message": f"Hoàn tất! Đã tải xuống {len(photos)} tệp cho {user}."})
+            with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, ensure_ascii=False, indent=4)
+            
+            all_nodes = self._get_all_nodes()
+            with self.timings.phase("extract"):
+                photos = self._extract_info_nodes(all_nodes)
+            self.timings.add("extract", photos=len(photos))
+            with self.timings.phase("html_fallback"):
+                html_photos = self._extract_info_nodes_in_html(user, history if incremental else None)
+            self.timings.add("html_fallback", photos=len(html_photos))
+            photos += html_photos
+
+            yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
+            downloaded = yield from self._download_files(photos, user_folder, history)
+            # Cào xong trọn vẹn: lần sau bắt đầu lại từ trang đầu.
+            checkpoint.clear()
+            yield self._done_event(f"Hoàn tất! Đã tải xuống {downloaded} tệp cho {user}.")
 
     def _get_profile_data(self):
-        """Truy xuất dữ liệu hồ sơ người dùng."""
-        try:
-            while not self._waiting_for_page_load():
-                time.sleep(1)
+        """Truy xuất dữ liệu hồ sơ người dùng (tải lại trang và thử lại có giới hạn)."""
+        for attempt in range(self.PROFILE_RETRIES):
+            if attempt:
+                self._reload_profile_page()
+            self._wait_for_page_load()
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            self._wait_for_new_nodes(0)
             self.driver.execute_script("window.scrollTo(0, 0);")
             try:
                 h1_text = self.driver.find_element(By.TAG_NAME, 'h1').text
-            except:
+            except Exception:
                 title = self.driver.title
                 h1_text = title.split(" | ")[0] if " | " in title else title
                 h1_text = h1_text.split(")")[1].strip() if ")" in h1_text else h1_text.strip()
 
             all_nodes = self._get_all_nodes()
-            user_id = base64.b64decode(all_nodes[0]['node']['id']).decode('utf-8').split(':')[1]
+            try:
+                user_id = base64.b64decode(all_nodes[0]['node']['id']).decode('utf-8').split(':')[1]
+            except (KeyError, IndexError, ValueError):
+                continue
             return {
                 "url": self.driver.current_url,
                 "name": re.sub(r"\s*\(.*?\)", "", h1_text).strip(),
                 "id": user_id,
                 "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
             }
-        except:
-            # return None
-            time.sleep(5)
-            return self._get_profile_data()
+        return None
         
     def get_photo_fbid_links(self):
         """
@@ -108,7 +134,7 @@ class FacebookScraper(BaseScraper):
         """
         # Lấy tất cả thẻ a
         self.driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(2)  # Đợi trang tải xong
+        self._wait_for_dom_idle()  # Đợi trang ổn định
         a_tags = self.driver.find_elements(By.TAG_NAME, "a")
 
         fbid_links = []
@@ -119,28 +145,15 @@ class FacebookScraper(BaseScraper):
 
         return fbid_links
 
-    def _extract_info_nodes(self, all_nodes):
-        """Trích xuất các nút hình ảnh từ dữ liệu đã thu thập."""
-        # photos (list): Danh sách các tuple chứa (image_url, post_url, taken_at).
-        results = []
-        for node in all_nodes:
-            image_url = node['node']['node']['viewer_image']['uri']
-            post_url = node['node']['url'].split('&')[0] 
-            taken_at = None
-            results.append((image_url, post_url, taken_at))
-        return results
-    
-    def _extract_info_nodes_in_html(self, user):
+    def _extract_info_nodes_in_html(self, user, history=None):
+        """Trích xuất ảnh từ các liên kết photo.php; bỏ qua liên kết đã có trong lịch sử nếu có `history`."""
         self.driver.get(f"https://www.facebook.com/{user}/photos_by")
-        time.sleep(5)
+        self._wait_for_page_load()
         results = []
-        self.driver.execute_script("window.scrollTo(0, 0);")
-        time.sleep(2)
         self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-        time.sleep(2)
+        self._wait_for_network_idle()
         self.driver.execute_script("window.scrollTo(0, 0);")
-        while not self._waiting_for_page_load():
-            time.sleep(2)
+        self._wait_for_dom_idle()
 
         a_tags = self.driver.find_elements(By.TAG_NAME, "a")
         fbid_links = []
@@ -148,23 +161,18 @@ class FacebookScraper(BaseScraper):
             href = a.get_attribute("href")
             if href and re.match(r"https://www\.facebook\.com/photo\.php\?fbid=\d+", href):
                 fbid_links.append(href.split('&')[0])  # Chỉ lấy phần trước dấu '?'
-        for fbid_link in fbid_links:
-            try:
-                self.driver.get(fbid_link)
-                time.sleep(2)
-                image_uri = self.driver.find_element(By.CSS_SELECTOR, 'img[data-visualcompletion="media-vc-image"]').get_attribute("src")
-                results.append((image_uri, fbid_link, None))
-            except Exception as e:
-                print(f"Lỗi khi trích xuất hình ảnh từ liên kết {fbid_link}: {e}")
+        if history is not None:
+            known = history.known_posts(fbid_links)
+            fbid_links = [link for link in fbid_links if link not in known]
+
+        def extract_image(fbid_link, timeout):
+            image = self._wait_for_element(By.CSS_SELECTOR, 'img[data-visualcompletion="media-vc-image"]', timeout)
+            if image is None:
+                raise TimeoutError("hết thời gian chờ ảnh")
+            return image.get_attribute("src")
+
+        image_uris = self._visit_in_tabs(fbid_links, extract_image)
+        for fbid_link, image_uri in zip(fbid_links, image_uris):
+            if image_uri:
+                results.append(MediaItem(image_uri, fbid_link, None))
         return results
-
-
-    def _get_all_nodes(self):
-        """Truy xuất tất cả các nút chứa thông tin hình ảnh."""
-        all_nodes = []
-        for request in self.driver.requests:
-            if request.response and request.headers.get('x-fb-friendly-name') == 'ProfileCometAppCollectionPhotosRendererPaginationQuery':
-                response = request.response
-                data = json.loads(decode(response.body, response.headers.get('Content-Encoding', 'identity')))
-                all_nodes.extend(data['data']['node']['pageItems']['edges'])
-        return all_nodes
\ No newline at end of file
@@ -0,0 +1,95 @@
+import os
+import re
+import time
+import sqlite3
+
+# Tiền tố thời gian mà _download_files thêm vào tên tệp: YYYYMMDD_HHMMSS_
+_TIMESTAMP_PREFIX = re.compile(r"^\d{8}_\d{6}_")
+
+
+def media_key(image_url):
+    """Định danh của một media: tên tệp trên CDN (ổn định giữa các lần cào và giữa các ảnh trong carousel)."""
+    return image_url.split("/")[-1].split('?')[0]
+
+
+class HistoryStore:
+    """
+    Lịch sử tải xuống có chỉ mục của một người dùng, lưu trong SQLite và khóa theo media.
+    Tự động nhập history.txt cũ (định dạng "post_url,filename") ở lần mở đầu tiên.
+    """
+    FILENAME = "history.sqlite"
+    LEGACY_FILENAME = "history.txt"
+
+    def __init__(self, user_folder):
+        os.makedirs(user_folder, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(user_folder, self.FILENAME))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
+                CREATE TABLE IF NOT EXISTS media (
+                    media_key TEXT PRIMARY KEY,
+                    post_url TEXT,
+                    filename TEXT,
+                    taken_at INTEGER,
+                    downloaded_at REAL,
+                    digest TEXT
+                )""")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(media)")}
+            if "digest" not in columns:
+                # Lịch sử tạo trước khi có kho blob.
+                self._conn.execute("ALTER TABLE media ADD COLUMN digest TEXT")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS media_post_url ON media (post_url)")
+            self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._import_legacy(os.path.join(user_folder, self.LEGACY_FILENAME))
+
+    def _import_legacy(self, legacy_file):
+        if not os.path.exists(legacy_file):
+            return
+        if self._conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_imported'").fetchone():
+            return
+        rows = []
+        with open(legacy_file, "r", encoding="utf-8") as f:
+            for line in f.read().splitlines():
+                post_url, _, filename = line.partition(',')
+                filename = filename.strip()
+                if filename:
+                    rows.append((_TIMESTAMP_PREFIX.sub("", filename), post_url.strip(), filename))
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR IGNORE INTO media (media_key, post_url, filename) VALUES (?, ?, ?)", rows)
+            self._conn.execute("INSERT INTO meta (key, value) VALUES ('legacy_imported', ?)", (str(time.time()),))
+
+    def known(self, keys):
+        """Trả về tập con của `keys` đã có trong lịch sử."""
+        return self._lookup("media_key", keys)
+
+    def known_posts(self, post_urls):
+        """Trả về tập con của `post_urls` đã có ít nhất một media trong lịch sử."""
+        return self._lookup("post_url", post_urls)
+
+    def _lookup(self, column, values):
+        values = list(set(values))
+        found = set()
+        # Giới hạn số tham số của SQLite cho mỗi truy vấn.
+        for start in range(0, len(values), 500):
+            chunk = values[start:start + 500]
+            placeholders = ", ".join("?" * len(chunk))
+            rows = self._conn.execute(f"SELECT {column} FROM media WHERE {column} IN ({placeholders})", chunk)
+            found.update(row[0] for row in rows)
+        return found
+
+    def add(self, key, post_url, filename, taken_at=None, digest=None):
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO media (media_key, post_url, filename, taken_at, downloaded_at, digest) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, post_url, filename, taken_at, time.time(), digest))
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,44 +1,58 @@
 import os
 import json
-import time
 from datetime import datetime, timezone
 from selenium.webdriver.common.by import By
-from seleniumwire.utils import decode
 from .base import BaseScraper
+from .history import HistoryStore
+from .checkpoint import Checkpoint
+from .extract import MediaExtractor
 class InstagramScraper(BaseScraper):
     """
     Cào dữ liệu các bài đăng và hình ảnh trên Instagram cho (các) người dùng được chỉ định.
     """
-    def __init__(self, headless=True, working_dir="CloudStorage"):
-        super().__init__(headless, working_dir)
-        self.driver.get("https://www.instagram.com/")
-        if not self._load_cookies("cookies/instagram.pkl"):
-            print("Vui lòng đăng nhập vào Instagram và lưu cookie.")
-            input("Nhấn Enter sau khi đăng nhập...")
-            self._save_cookies("cookies/instagram.pkl")
+    PLATFORM = "instagram"
+    HOME_URL = "https://www.instagram.com/"
+    CAPTURE_SCOPES = (r'https://www\.instagram\.com/(api/)?graphql',)
+    COOKIE_FILE = "cookies/instagram.pkl"
+    SESSION_COOKIE = "sessionid"
+    GRAPHQL_QUERIES = ('PolarisProfilePostsQuery', 'PolarisProfilePostsTabContentQuery_connection')
+    PROFILE_QUERY = 'PolarisProfilePageContentQuery'
+    EXTRACTOR = MediaExtractor(
+        "instagram",
+        connection=('data', 'xdt_api__v1__feed__user_timeline_graphql_connection'),
+        post=('node',),
+        children=('carousel_media',),
+        image=('image_versions2', 'candidates'),
+        post_url=lambda post, edge: f"https://www.instagram.com/p/{post['code']}/",
+        media_type=('media_type',),
+        media_types={1: 'image', 2: 'video'},
+    )
 
-    def scrape_users(self, users):
+    def __init__(self, headless=True, working_dir="CloudStorage", download_workers=10, block_resources=True,
+                 interactive=True, profile_root="browser_profiles"):
+        super().__init__(headless, working_dir, download_workers, block_resources, profile_root)
+        self._login(interactive)
+
+    def scrape_users(self, users, api_replay=False, incremental=False):
         """Cào dữ liệu nhiều người dùng Instagram."""
         for user in users:
             # yield from will pass through all yielded events from scrape_user
-            yield from self.scrape_user(user)
+            yield from self.scrape_user(user, api_replay=api_replay, incremental=incremental)
 
-    def scrape_user(self, user):
+    def scrape_user(self, user, api_replay=False, incremental=False):
         """Cào dữ liệu một người dùng Instagram duy nhất."""
         if not user: return
+        self.timings.reset()
         yield self._yield_event("status", {"message": f"Đang kết nối tới Instagram cho người dùng: {user}..."})
-        self.driver.get("https://www.instagram.com/")
-        if not self._load_cookies("cookies/instagram.pkl"):
+        if not self._ensure_login():
             yield self._yield_event("error", {"message": "Cookie Instagram không tìm thấy. Vui lòng đăng nhập thủ công và lưu lại."})
             return
 
         print(f"Đang cào dữ liệu người dùng Instagram: {user}")
-        self.driver.scopes = ['https://www.instagram.com/graphql/query*']
         self._clean_driver_requests()
-        self.driver.get(f"https://www.instagram.com/{user}/")
-        time.sleep(5)
-
-        profile_data = self._get_profile_data()
+        with self.timings.phase("profile"):
+            self.driver.get(f"https://www.instagram.com/{user}/")
+            profile_data = self._wait_for_profile()
         if not profile_data:
             print(f"Không thể truy xuất dữ liệu hồ sơ cho người dùng {user}")
             yield self._yield_event("error", {"message": f"Không thể tìm thấy hồ sơ cho người dùng {user}."})
@@ -51,64 +65,37 @@ class InstagramScraper(BaseScraper):
 
         yield self._yield_event("profile", profile_data)
         yield self._yield_event("status", {"message": "Đã tìm thấy hồ sơ. Bắt đầu cuộn trang để thu thập bài đăng..."})
-        # The scroll_to_bottom method now yields progress events
-        yield from self._scroll_to_bottom()
-
         user_folder = os.path.join(self.working_dir, "instagram", user)
-        os.makedirs(user_folder, exist_ok=True)
-        with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, ensure_ascii=False, indent=4)
+        with HistoryStore(user_folder) as history, Checkpoint(user_folder, self.CHECKPOINT_MAX_AGE) as checkpoint:
+            # _collect_pages yields progress events (scrolling or GraphQL replay)
+            yield from self._collect_pages(api_replay, history if incremental else None, checkpoint)
+
+            with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, ensure_ascii=False, indent=4)
             
-        all_nodes = self._get_all_nodes()
-        photos = self._extract_info_nodes(all_nodes)
+            all_nodes = self._get_all_nodes()
+            with self.timings.phase("extract"):
+                photos = self._extract_info_nodes(all_nodes)
+            self.timings.add("extract", photos=len(photos))
 
-        yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
-        self._download_files(photos, user_folder, os.path.join(user_folder, "history.txt"))
-        yield self._yield_event("done", {"message": f"Hoàn tất! Đã tải xuống {len(photos)} tệp cho {user}."})
+            yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
+            downloaded = yield from self._download_files(photos, user_folder, history)
+            # Cào xong trọn vẹn: lần sau bắt đầu lại từ trang đầu.
+            checkpoint.clear()
+            yield self._done_event(f"Hoàn tất! Đã tải xuống {downloaded} tệp cho {user}.")
                 
-        print(f"\tĐã cào dữ liệu thành công {len(photos)} hình ảnh cho người dùng {user}")
+            print(f"\tĐã cào dữ liệu thành công {len(photos)} hình ảnh cho người dùng {user}")
 
-    def _get_all_nodes(self):
-        """Truy xuất tất cả các nút chứa thông tin hình ảnh."""
-        all_nodes = []
-        for request in self.driver.requests:
-            # if request.response and request.headers.get('x-fb-friendly-name') == 'ProfileCometAppCollectionPhotosRendererPaginationQuery':
-            if request.response and request.headers.get('x-fb-friendly-name') in ['PolarisProfilePostsQuery', 'PolarisProfilePostsTabContentQuery_connection']:
-                response = request.response
-                data = json.loads(decode(response.body, response.headers.get('Content-Encoding', 'identity')))
-                all_nodes.extend(data['data']['xdt_api__v1__feed__user_timeline_graphql_connection']['edges'])
-        return all_nodes
-    
     def _get_profile_data(self):
         """Truy xuất dữ liệu hồ sơ người dùng."""
-        for request in self.driver.requests:
-            if request.response and request.headers.get('x-fb-friendly-name') == 'PolarisProfilePageContentQuery':
-                data = json.loads(decode(request.response.body, request.response.headers.get('Content-Encoding', 'identity')))
-                if 'data' in data and 'user' in data['data']:
-                    _data = data['data']['user']
-                    break
+        self._get_all_nodes()
+        data = self.collector.payloads.get(self.PROFILE_QUERY)
+        if not data or 'data' not in data or 'user' not in data['data']:
+            return None
+        _data = data['data']['user']
         return {
             "url": self.driver.current_url,
             "name": _data.get('full_name', '').strip(),
             "id": _data.get('id', ''),
             "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         }
-    
-    def _extract_info_nodes(self, all_nodes):
-        """Trích xuất các nút hình ảnh từ dữ liệu đã thu thập."""
-        # photos (list): Danh sách các tuple chứa (image_url, post_url, taken_at).
-        results = []
-        for node in all_nodes:
-            carousel_media = node['node'].get('carousel_media', [])
-            if not carousel_media:
-                image_url = node['node']['image_versions2']['candidates'][0]['url']
-                taken_at = node['node'].get('taken_at')
-                post_url = f"https://www.instagram.com/p/{node['node']['code']}/"
-                results.append((image_url, post_url, taken_at))
-            else:
-                for media in carousel_media:
-                    image_url = media['image_versions2']['candidates'][0]['url']
-                    taken_at = media.get('taken_at')
-                    post_url = f"https://www.instagram.com/p/{node['node']['code']}/"
-                    results.append((image_url, post_url, taken_at))
-        return results
\ No newline at end of file
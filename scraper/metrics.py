@@ -0,0 +1,207 @@
+import time
+import threading
+from contextlib import contextmanager
+
+# Mốc histogram mặc định (giây), từ yêu cầu HTTP nhanh tới một lần cào dài.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600)
+
+
+class PhaseTimer:
+    """
+    Đo thời gian từng giai đoạn của một lần cào (đăng nhập, hồ sơ, cuộn, giải mã, tải xuống...)
+    kèm các bộ đếm như số trang, số nút, số ảnh, số byte. Một giai đoạn có thể được đo
+    nhiều lần; thời gian và bộ đếm được cộng dồn.
+    """
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.phases = {}  # tên giai đoạn -> {"seconds": tổng thời gian, bộ đếm...}
+
+    @contextmanager
+    def phase(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds=0.0, **counts):
+        entry = self.phases.setdefault(name, {"seconds": 0.0})
+        entry["seconds"] += seconds
+        for key, value in counts.items():
+            entry[key] = entry.get(key, 0) + value
+
+    def summary(self):
+        return {name: {**entry, "seconds": round(entry["seconds"], 3)} for name, entry in self.phases.items()}
+
+
+def _format_labels(labelnames, values, extra=()):
+    pairs = list(zip(labelnames, values)) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+def _format_value(value):
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    TYPE = None
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.TYPE}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class Counter(_Metric):
+    TYPE = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def _samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Gauge(_Metric):
+    """Gauge đặt giá trị trực tiếp, hoặc đọc giá trị từ một hàm lúc xuất số liệu (set_function)."""
+    TYPE = "gauge"
+
+    def __init__(self, name, help, labelnames=()):
+        super().__init__(name, help, labelnames)
+        self._function = None
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function):
+        """function() trả về một số, hoặc {bộ giá trị nhãn: số} khi gauge có nhãn."""
+        self._function = function
+
+    def _samples(self):
+        if self._function is not None:
+            values = self._function()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                for key, value in sorted(values.items())]
+
+
+class Histogram(_Metric):
+    TYPE = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * len(self.buckets), 0.0, 0)
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def _samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        lines = []
+        for key, (counts, total, count) in sorted(values.items()):
+            for bound, bucket_count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', bound)])} {bucket_count}")
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, [('le', '+Inf')])} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Tập hợp các số liệu của tiến trình, xuất theo định dạng văn bản của Prometheus."""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _register(self, cls, name, *args, **kwargs):
+        with self._lock:
+            if name not in self._metrics:
+                self._metrics[name] = cls(name, *args, **kwargs)
+            return self._metrics[name]
+
+    def counter(self, name, help, labelnames=()):
+        return self._register(Counter, name, help, labelnames)
+
+    def gauge(self, name, help, labelnames=()):
+        return self._register(Gauge, name, help, labelnames)
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram, name, help, labelnames, buckets)
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+PHASE_SECONDS = REGISTRY.histogram(
+    "scraper_phase_seconds", "Thời gian của từng giai đoạn cào.", ("platform", "phase"))
+PHASE_ITEMS = REGISTRY.counter(
+    "scraper_phase_items_total", "Số trang/nút/ảnh/byte được xử lý trong từng giai đoạn.", ("platform", "phase", "kind"))
+DRIVER_STARTUP = REGISTRY.histogram(
+    "scraper_driver_startup_seconds", "Thời gian khởi động một trình duyệt cào.", ("platform",))
+SCRAPES = REGISTRY.counter("scraper_scrapes_total", "Số lần cào hoàn tất.", ("platform",))
+DOWNLOADS_QUEUED = REGISTRY.gauge("scraper_downloads_queued", "Số tệp đang chờ hoặc đang tải.")
+
+
+def record_phases(platform, timer):
+    """Cộng dồn các giai đoạn của một lần cào vào số liệu toàn tiến trình."""
+    for phase, entry in timer.phases.items():
+        PHASE_SECONDS.observe(entry["seconds"], platform=platform, phase=phase)
+        for kind, value in entry.items():
+            if kind != "seconds":
+                PHASE_ITEMS.inc(value, platform=platform, phase=phase, kind=kind)
+    SCRAPES.inc(platform=platform)
@@ -0,0 +1,155 @@
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+
+
+class ScraperPool:
+    """
+    Pool các trình cào (mỗi trình cào giữ một Chrome/selenium-wire) đã đăng nhập sẵn,
+    được tái sử dụng giữa các lần cào thay vì khởi động lại trình duyệt mỗi lần.
+    """
+    def __init__(self, factory, min_size=0, max_size=2, idle_timeout=600, reap_interval=30):
+        self.factory = factory
+        self.min_size = min_size
+        self.max_size = max(max_size, 1)
+        self.idle_timeout = idle_timeout
+        self.reap_interval = reap_interval
+        self._idle = deque()  # (scraper, thời điểm trả về pool)
+        self._size = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._stopped = threading.Event()
+        self._reaper = None
+
+    @contextmanager
+    def lease(self, timeout=None):
+        """Mượn một trình cào đã đăng nhập; tự động trả lại khi kết thúc khối with."""
+        scraper = self._acquire(timeout)
+        try:
+            yield scraper
+        finally:
+            self._release(scraper)
+
+    def stats(self):
+        with self._cond:
+            return {"size": self._size, "idle": len(self._idle), "in_use": self._size - len(self._idle)}
+
+    def close(self):
+        """Đóng tất cả trình duyệt đang rảnh; các trình cào đang được mượn sẽ bị đóng khi trả về."""
+        with self._cond:
+            self._closed = True
+            idle = [scraper for scraper, _ in self._idle]
+            self._idle.clear()
+            self._size -= len(idle)
+            self._cond.notify_all()
+        self._stopped.set()
+        for scraper in idle:
+            self._destroy(scraper)
+
+    def _acquire(self, timeout):
+        self._start_reaper()
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._cond:
+                if self._closed:
+                    raise RuntimeError("Pool trình cào đã bị đóng.")
+                if self._idle:
+                    scraper, _ = self._idle.pop()
+                    create = False
+                elif self._size < self.max_size:
+                    self._size += 1
+                    scraper, create = None, True
+                else:
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        raise TimeoutError("Không còn trình duyệt rảnh trong pool.")
+                    self._cond.wait(remaining)
+                    continue
+
+            if create:
+                try:
+                    return self.factory()
+                except Exception:
+                    self._discard(None)
+                    raise
+
+            if self._is_healthy(scraper):
+                return scraper
+            self._discard(scraper)
+
+    def _release(self, scraper):
+        healthy = self._is_healthy(scraper)
+        if healthy:
+            try:
+                # Xóa lưu lượng đã bắt giữa các lần mượn.
+                scraper._clean_driver_requests()
+            except Exception:
+                healthy = False
+        with self._cond:
+            if healthy and not self._closed:
+                self._idle.append((scraper, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(scraper)
+
+    def _discard(self, scraper):
+        with self._cond:
+            self._size -= 1
+            self._cond.notify()
+        if scraper is not None:
+            self._destroy(scraper)
+
+    @staticmethod
+    def _destroy(scraper):
+        try:
+            scraper.close()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _is_healthy(scraper):
+        try:
+            return scraper.is_alive()
+        except Exception:
+            return False
+
+    def _start_reaper(self):
+        with self._cond:
+            if self._reaper is not None:
+                return
+            self._reaper = threading.Thread(target=self._reap_loop, name="scraper-pool-reaper", daemon=True)
+        self._reaper.start()
+
+    def _reap_loop(self):
+        while not self._stopped.wait(self.reap_interval):
+            with self._cond:
+                if self._closed:
+                    return
+                now = time.monotonic()
+                expired = []
+                # Các phần tử cũ nhất nằm ở đầu hàng đợi.
+                while (self._idle and self._size - len(expired) > self.min_size
+                       and now - self._idle[0][1] > self.idle_timeout):
+                    expired.append(self._idle.popleft()[0])
+                self._size -= len(expired)
+                missing = max(self.min_size - self._size, 0)
+                self._size += missing
+            for scraper in expired:
+                self._destroy(scraper)
+            for _ in range(missing):
+                self._warm_up()
+
+    def _warm_up(self):
+        try:
+            scraper = self.factory()
+        except Exception as e:
+            print(f"Lỗi khi khởi tạo trình duyệt cho pool: {e}")
+            self._discard(None)
+            return
+        with self._cond:
+            if not self._closed:
+                self._idle.append((scraper, time.monotonic()))
+                self._cond.notify()
+                return
+        self._discard(scraper)
@@ -0,0 +1,46 @@
+import os
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+def _try_lock(f):
+    try:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        return True
+    except OSError:
+        return False
+
+
+class ProfileSlot:
+    """
+    Một thư mục hồ sơ Chrome (user-data-dir) bền vững trong `root`, giữ cookie và bộ đệm
+    giữa các lần chạy. Chrome chỉ cho một tiến trình dùng mỗi thư mục, nên mỗi trình duyệt
+    đang chạy (trong pool hoặc ở tiến trình khác) giữ khóa của một ô riêng: root/0, root/1, ...
+    """
+    LOCK_FILENAME = ".scraper.lock"
+
+    def __init__(self, root, max_slots=64):
+        os.makedirs(root, exist_ok=True)
+        for index in range(max_slots):
+            path = os.path.join(root, str(index))
+            os.makedirs(path, exist_ok=True)
+            lock_file = open(os.path.join(path, self.LOCK_FILENAME), 'a+')
+            if _try_lock(lock_file):
+                self.path = path
+                self._lock_file = lock_file
+                return
+            lock_file.close()
+        raise RuntimeError(f"Tất cả {max_slots} hồ sơ trình duyệt trong {root} đang được sử dụng.")
+
+    def release(self):
+        if self._lock_file is not None:
+            # Đóng tệp cũng giải phóng khóa.
+            self._lock_file.close()
+            self._lock_file = None
@@ -0,0 +1,215 @@
+import os
+import json
+import time
+import random
+import fnmatch
+import threading
+from urllib.parse import urlsplit
+import requests
+from .metrics import REGISTRY
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Lớp host: (tên, mẫu tên miền, mẫu đường dẫn), so khớp theo thứ tự bằng fnmatch.
+HOST_CLASSES = (
+    ('graphql', '*', '*/graphql*'),
+    ('cdninstagram', '*.cdninstagram.com', '*'),
+    ('fbcdn', '*.fbcdn.net', '*'),
+)
+# Giới hạn của mỗi lớp host: (số yêu cầu/giây tối đa, số yêu cầu dồn tối đa).
+RATE_LIMITS = {
+    'graphql': (1.0, 3),
+    'cdninstagram': (20.0, 40),
+    'fbcdn': (20.0, 40),
+}
+# Mã trạng thái coi là bị giới hạn/quá tải: giảm tốc và thử lại.
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Chuyển hướng tới các trang này nghĩa là nền tảng đang nghi ngờ lưu lượng tự động.
+BLOCK_REDIRECT_MARKERS = ('/challenge', '/checkpoint')
+
+THROTTLED = REGISTRY.counter(
+    "scraper_rate_limited_total", "Số phản hồi bị giới hạn tốc độ (429/5xx/chuyển hướng kiểm tra).", ("host_class",))
+RETRIES = REGISTRY.counter("scraper_request_retries_total", "Số lần thử lại yêu cầu HTTP.", ("host_class",))
+
+
+def _lock(f):
+    if fcntl is not None:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+    else:
+        f.seek(0)
+        msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+
+
+class TokenBucket:
+    """
+    Token bucket với tốc độ thích nghi kiểu AIMD: mỗi phản hồi thành công tăng tốc độ thêm một
+    bước cộng (tới trần `max_rate`), mỗi lần bị giới hạn giảm một nửa (tới sàn `min_rate`).
+    Nếu có `state_path`, trạng thái nằm trong một tệp được khóa nên nhiều tiến trình dùng chung.
+    """
+    def __init__(self, max_rate, burst, min_rate=None, state_path=None):
+        self.max_rate = max_rate
+        self.burst = burst
+        self.min_rate = min_rate or max_rate / 20
+        self.increase = max_rate / 100
+        self.state_path = state_path
+        self._state = self._initial_state()
+        self._lock = threading.Lock()
+
+    def _initial_state(self):
+        # Dùng time.time() (không phải monotonic) để các tiến trình so sánh được với nhau.
+        return {'tokens': float(self.burst), 'updated': time.time(), 'rate': self.max_rate, 'blocked_until': 0.0}
+
+    def _update(self, change):
+        """Gọi change(state) dưới khóa (luồng và, nếu dùng chung, tệp) và lưu lại trạng thái."""
+        with self._lock:
+            if self.state_path is None:
+                return change(self._state)
+            with open(self.state_path, 'a+', encoding='utf-8') as f:
+                _lock(f)
+                f.seek(0)
+                raw = f.read()
+                try:
+                    state = json.loads(raw) if raw else self._initial_state()
+                except ValueError:
+                    state = self._initial_state()
+                result = change(state)
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(state))
+                f.flush()
+                return result
+
+    def _take(self, state):
+        now = time.time()
+        if now < state['blocked_until']:
+            return state['blocked_until'] - now
+        state['tokens'] = min(self.burst, state['tokens'] + (now - state['updated']) * state['rate'])
+        state['updated'] = now
+        if state['tokens'] >= 1:
+            state['tokens'] -= 1
+            return 0
+        return (1 - state['tokens']) / state['rate']
+
+    def acquire(self):
+        """Chờ tới khi có một token."""
+        while True:
+            wait = self._update(self._take)
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def on_success(self):
+        def increase(state):
+            state['rate'] = min(self.max_rate, state['rate'] + self.increase)
+        self._update(increase)
+
+    def on_throttle(self, retry_after=None):
+        def decrease(state):
+            state['rate'] = max(self.min_rate, state['rate'] / 2)
+            state['tokens'] = min(state['tokens'], 0.0)
+            if retry_after:
+                state['blocked_until'] = max(state['blocked_until'], time.time() + retry_after)
+        self._update(decrease)
+
+    @property
+    def rate(self):
+        return self._update(lambda state: state['rate'])
+
+
+class RateLimiter:
+    """
+    Giới hạn tốc độ theo lớp host, dùng chung cho mọi trình cào và trình tải trong tiến trình.
+    Đặt biến môi trường SCRAPER_RATE_LIMIT_DIR (hoặc `state_dir`) để chia sẻ giữa các tiến trình.
+    """
+    def __init__(self, limits=RATE_LIMITS, host_classes=HOST_CLASSES, state_dir=None, retries=4,
+                 backoff_base=1.0, backoff_cap=60.0):
+        self.host_classes = host_classes
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_cap = backoff_cap
+        if state_dir:
+            os.makedirs(state_dir, exist_ok=True)
+        self.buckets = {
+            name: TokenBucket(rate, burst, state_path=os.path.join(state_dir, f"{name}.json") if state_dir else None)
+            for name, (rate, burst) in limits.items()
+        }
+
+    def classify(self, url):
+        """Tên lớp host của `url`, hoặc None nếu không bị giới hạn."""
+        parts = urlsplit(url)
+        hostname, path = parts.hostname or '', parts.path or '/'
+        for name, host_pattern, path_pattern in self.host_classes:
+            if fnmatch.fnmatch(hostname, host_pattern) and fnmatch.fnmatch(path, path_pattern):
+                return name
+        return None
+
+    def acquire(self, host_class):
+        bucket = self.buckets.get(host_class)
+        if bucket is not None:
+            bucket.acquire()
+
+    def feedback(self, host_class, status, location=None, retry_after=None):
+        """
+        Cập nhật tốc độ của `host_class` theo mã trạng thái và đích chuyển hướng (`location`)
+        của một phản hồi. Trả về True nếu phản hồi cho thấy đang bị giới hạn.
+        """
+        bucket = self.buckets.get(host_class)
+        if bucket is None:
+            return False
+        throttled = status in RETRY_STATUSES or bool(
+            location and any(marker in location for marker in BLOCK_REDIRECT_MARKERS))
+        if throttled:
+            THROTTLED.inc(host_class=host_class)
+            bucket.on_throttle(retry_after)
+        elif status < 400:
+            bucket.on_success()
+        return throttled
+
+    def backoff(self, attempt, retry_after=None):
+        """Thời gian chờ trước lần thử lại thứ `attempt` (full jitter), không ít hơn Retry-After."""
+        delay = random.uniform(0, min(self.backoff_cap, self.backoff_base * 2 ** attempt))
+        return max(delay, retry_after or 0)
+
+    def request(self, session, method, url, retries=None, **kwargs):
+        """
+        session.request() có giới hạn tốc độ: chờ token của lớp host, và khi gặp 429/5xx hoặc lỗi
+        kết nối thì giảm tốc rồi thử lại sau một khoảng ngẫu nhiên. Trả về phản hồi cuối cùng.
+        """
+        host_class = self.classify(url)
+        retries = self.retries if retries is None else retries
+        for attempt in range(retries + 1):
+            self.acquire(host_class)
+            try:
+                response = session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if attempt == retries:
+                    raise
+                retry_after = None
+            else:
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                # requests tự theo chuyển hướng: URL cuối cho biết có bị đưa tới trang kiểm tra hay không.
+                location = response.headers.get('Location') or (response.url if response.history else None)
+                throttled = self.feedback(host_class, response.status_code, location, retry_after)
+                if not throttled or attempt == retries:
+                    return response
+                response.close()
+            RETRIES.inc(host_class=host_class or "other")
+            time.sleep(self.backoff(attempt, retry_after))
+
+
+def parse_retry_after(value):
+    """Số giây trong header Retry-After (bỏ qua dạng ngày giờ)."""
+    try:
+        return max(float(value), 0.0) if value else None
+    except ValueError:
+        return None
+
+
+RATE_LIMITER = RateLimiter(state_dir=os.environ.get('SCRAPER_RATE_LIMIT_DIR') or None)
+
+REGISTRY.gauge("scraper_rate_limit_rps", "Tốc độ cho phép hiện tại theo lớp host.", ("host_class",)).set_function(
+    lambda: {(name,): bucket.rate for name, bucket in RATE_LIMITER.buckets.items()})
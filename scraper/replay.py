@@ -0,0 +1,67 @@
+import json
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+import requests
+from .extract import loads
+from .ratelimit import RATE_LIMITER
+
+# Các header do trình duyệt/kết nối tự quản lý, không sao chép khi phát lại.
+_SKIPPED_HEADERS = {'cookie', 'content-length', 'host', 'connection', 'accept-encoding'}
+
+
+class GraphQLReplayer:
+    """
+    Phát lại một truy vấn GraphQL phân trang đã bắt được từ trình duyệt qua một
+    phiên HTTP thông thường (keep-alive), thay con trỏ phân trang cho mỗi trang.
+    """
+    def __init__(self, cookies=(), timeout=30):
+        self.timeout = timeout
+        self.session = requests.Session()
+        for cookie in cookies:
+            self.session.cookies.set(cookie['name'], cookie['value'],
+                                     domain=cookie.get('domain'), path=cookie.get('path', '/'))
+
+    def pages(self, name, template, cursor, cursor_variable, get_connection):
+        """
+        Sinh ra (name, data) cho từng trang tiếp theo, bắt đầu từ `cursor`,
+        dừng khi page_info cho biết không còn trang nào.
+        """
+        while cursor:
+            response = RATE_LIMITER.request(
+                self.session,
+                template.method,
+                self._build_url(template.url, cursor_variable, cursor, template.method),
+                headers={k: v for k, v in template.headers.items() if k.lower() not in _SKIPPED_HEADERS},
+                data=self._build_body(template.body, cursor_variable, cursor),
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            data = loads(response.content)
+            yield name, data
+            page_info = get_connection(name, data).get('page_info') or {}
+            if not page_info.get('has_next_page'):
+                break
+            cursor = page_info.get('end_cursor')
+
+    def close(self):
+        self.session.close()
+
+    @staticmethod
+    def _with_cursor(params, cursor_variable, cursor):
+        params = dict(params)
+        variables = json.loads(params.get('variables') or '{}')
+        variables[cursor_variable] = cursor
+        params['variables'] = json.dumps(variables, separators=(',', ':'))
+        return params
+
+    def _build_url(self, url, cursor_variable, cursor, method):
+        if method.upper() != 'GET':
+            return url
+        parts = urlsplit(url)
+        params = self._with_cursor(parse_qsl(parts.query, keep_blank_values=True), cursor_variable, cursor)
+        return urlunsplit(parts._replace(query=urlencode(params)))
+
+    def _build_body(self, body, cursor_variable, cursor):
+        if not body:
+            return None
+        params = parse_qsl(body.decode('utf-8'), keep_blank_values=True)
+        return urlencode(self._with_cursor(params, cursor_variable, cursor))
@@ -3,45 +3,59 @@ import json
 import time
 from seleniumwire import webdriver
 from selenium.webdriver.common.by import By
-from seleniumwire.utils import decode
 from datetime import datetime, timezone
 from .base import BaseScraper
+from .history import HistoryStore
+from .checkpoint import Checkpoint
+from .extract import MediaExtractor, MediaItem
 
 class ThreadsScraper(BaseScraper):
     """
     Cào dữ liệu các bài đăng và hình ảnh trên Threads cho (các) người dùng được chỉ định.
     """
-    def __init__(self, headless=True, working_dir="CloudStorage"):
-        super().__init__(headless, working_dir)
-        self.driver.get("https://www.threads.net/")
-        if not self._load_cookies("cookies/threads.pkl"):
-            print("Vui lòng đăng nhập vào Threads và lưu cookie.")
-            input("Nhấn Enter sau khi đăng nhập...")
-            self._save_cookies("cookies/threads.pkl")
-
-    def scrape_users(self, users):
+    PLATFORM = "threads"
+    HOME_URL = "https://www.threads.net/"
+    CAPTURE_SCOPES = (r'https://www\.threads\.(net|com)/(api/)?graphql',)
+    COOKIE_FILE = "cookies/threads.pkl"
+    SESSION_COOKIE = "sessionid"
+    GRAPHQL_QUERIES = ('BarcelonaProfileThreadsTabRefetchableDirectQuery',)
+    EXTRACTOR = MediaExtractor(
+        "threads",
+        connection=('data', 'mediaData'),
+        post=('node', 'thread_items', '*', 'post'),
+        children=('carousel_media',),
+        image=('image_versions2', 'candidates'),
+        post_url=lambda post, edge: f"https://www.threads.net/post/{post['code']}",
+        media_type=('media_type',),
+        media_types={1: 'image', 2: 'video'},
+    )
+    WAIT_TIMEOUTS = {**BaseScraper.WAIT_TIMEOUTS, "scroll": 6}
+
+    def __init__(self, headless=True, working_dir="CloudStorage", download_workers=10, block_resources=True,
+                 interactive=True, profile_root="browser_profiles"):
+        super().__init__(headless, working_dir, download_workers, block_resources, profile_root)
+        self._login(interactive)
+
+    def scrape_users(self, users, api_replay=False, incremental=False):
         """Cào dữ liệu nhiều người dùng Threads."""
         for user in users:
-            yield from self.scrape_user(user)
+            yield from self.scrape_user(user, api_replay=api_replay, incremental=incremental)
 
-    def scrape_user(self, user):
+    def scrape_user(self, user, api_replay=False, incremental=False):
         """Cào dữ liệu một người dùng Threads duy nhất."""
         if not user: return
+        self.timings.reset()
         yield self._yield_event("status", {"message": f"Đang kết nối tới Threads cho người dùng: {user}..."})
-        self.driver.get("https://www.threads.net/")
-        if not self._load_cookies("cookies/threads.pkl"):
+        if not self._ensure_login():
             yield self._yield_event("error", {"message": "Cookie Threads không tìm thấy. Vui lòng đăng nhập thủ công và lưu lại."})
             return
 
         print(f"Đang cào dữ liệu người dùng Threads: {user}")
-        # self.driver.scopes = ['https://www.facebook.com/api/graphql/*']
         self._clean_driver_requests()
 
-        self.driver.get(f"https://www.threads.net/@{user}")
-
-        time.sleep(5)
-
-        profile_data = self._get_profile_data()
+        with self.timings.phase("profile"):
+            self.driver.get(f"https://www.threads.net/@{user}")
+            profile_data = self._wait_for_profile()
         if not profile_data:
             yield self._yield_event("error", {"message": f"Không thể tìm thấy hồ sơ cho người dùng {user}."})
             print(f"Không thể truy xuất dữ liệu hồ sơ cho người dùng {user}")
@@ -54,57 +68,53 @@ class ThreadsScraper(BaseScraper):
         yield self._yield_event("profile", profile_data)
         yield self._yield_event("status", {"message": "Đã tìm thấy hồ sơ. Bắt đầu cuộn trang để thu thập bài đăng..."})
 
-        yield from self._scroll_to_bottom()
-
         user_folder = os.path.join(self.working_dir, "threads", user)
-        os.makedirs(user_folder, exist_ok=True)
-        
-        with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
-            json.dump(profile_data, f, ensure_ascii=False, indent=4)
+        with HistoryStore(user_folder) as history, Checkpoint(user_folder, self.CHECKPOINT_MAX_AGE) as checkpoint:
+            yield from self._collect_pages(api_replay, history if incremental else None, checkpoint)
+
+            with open(os.path.join(user_folder, 'info.json'), 'w', encoding='utf-8') as f:
+                json.dump(profile_data, f, ensure_ascii=False, indent=4)
             
-        all_nodes = self._get_all_nodes()
-        print(f"\tĐã thu thập {len(all_nodes)} bài đăng từ người dùng {user}")
-        photos = self._extract_info_nodes(all_nodes)
-        photos += self._extract_info_nodes_in_html(user)
+            all_nodes = self._get_all_nodes()
+            print(f"\tĐã thu thập {len(all_nodes)} bài đăng từ người dùng {user}")
+            with self.timings.phase("extract"):
+                photos = self._extract_info_nodes(all_nodes)
+            self.timings.add("extract", photos=len(photos))
+            with self.timings.phase("html_fallback"):
+                html_photos = self._extract_info_nodes_in_html(user, history if incremental else None)
+            self.timings.add("html_fallback", photos=len(html_photos))
+            photos += html_photos
 
         
-        print(f"\tĐã thu thập {len(photos)} hình ảnh từ người dùng {user}")
-        yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
-        self._download_files(photos, user_folder, os.path.join(user_folder, "history.txt"))
-        yield self._yield_event("done", {"message": f"Hoàn tất! Đã tải xuống {len(photos)} tệp cho {user}."})
-        print(f"\tĐã cào dữ liệu thành công {len(photos)} hình ảnh cho người dùng {user}")
+            print(f"\tĐã thu thập {len(photos)} hình ảnh từ người dùng {user}")
+            yield self._yield_event("status", {"message": f"Đã thu thập xong. Bắt đầu tải xuống {len(photos)} tệp..."})
+            downloaded = yield from self._download_files(photos, user_folder, history)
+            # Cào xong trọn vẹn: lần sau bắt đầu lại từ trang đầu.
+            checkpoint.clear()
+            yield self._done_event(f"Hoàn tất! Đã tải xuống {downloaded} tệp cho {user}.")
+            print(f"\tĐã cào dữ liệu thành công {len(photos)} hình ảnh cho người dùng {user}")
 
     def _get_profile_data(self):
         """Truy xuất dữ liệu hồ sơ người dùng."""
-        for request in self.driver.requests:
-            if request.response and request.headers.get('x-fb-friendly-name') in ['BarcelonaProfileThreadsTabRefetchableDirectQuery']:
-                data = json.loads(decode(request.response.body, request.response.headers.get('Content-Encoding', 'identity')))
-                break
+        all_nodes = self._get_all_nodes()
+        if not all_nodes:
+            return None
+        user = all_nodes[0]['node']['thread_items'][0]['post']['user']
         return {
             "url": self.driver.current_url,
-            "name": data['data']['mediaData']['edges'][0]['node']['thread_items'][0]['post']['user'].get('full_name', '').strip(),
-            "id": data['data']['mediaData']['edges'][0]['node']['thread_items'][0]['post']['user'].get('id', ''),
+            "name": user.get('full_name', '').strip(),
+            "id": user.get('id', ''),
             "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
         }
     
-    def _get_all_nodes(self):
-        """Truy xuất tất cả các nút chứa thông tin hình ảnh."""
-        all_nodes = []
-        for request in self.driver.requests:
-            if request.response and request.headers.get('x-fb-friendly-name') in ['BarcelonaProfileThreadsTabRefetchableDirectQuery']:
-                response = request.response
-                data = json.loads(decode(response.body, response.headers.get('Content-Encoding', 'identity')))
-                all_nodes.extend(data['data']['mediaData']['edges'])
-        return all_nodes
-    
-    def _extract_info_nodes_in_html(self, user):
-        """Trích xuất các nút hình ảnh từ dữ liệu đã thu thập."""
+    def _extract_info_nodes_in_html(self, user, history=None):
+        """Trích xuất các nút hình ảnh từ trang hồ sơ; bỏ qua bài đăng đã có trong lịch sử nếu có `history`."""
         self.driver.get(f"https://www.threads.net/@{user}")
-        time.sleep(5)
         try:
-            div_element = self.driver.find_element(
+            div_element = self._wait_for_element(
                 By.XPATH,
-                '//div[@role="dialog" and @data-pressable-container="true" and @data-interactive-id="" and contains(@style, "opacity: 1")]'
+                '//div[@role="dialog" and @data-pressable-container="true" and @data-interactive-id="" and contains(@style, "opacity: 1")]',
+                self.WAIT_TIMEOUTS["page"],
             )
 
             links = div_element.find_elements(By.XPATH, f"//a[starts-with(@href, '/@{user}/post/')]")
@@ -135,41 +145,20 @@ class ThreadsScraper(BaseScraper):
                 # print(f"Lỗi khi xử lý liên kết {link.get_attribute('href')}: {e}")
                 pass
 
-        for post_url, taken_at in posts:
-            self.driver.get(post_url+"/media")
-            time.sleep(2)
-            image_element = self.driver.find_elements(By.XPATH, '//img[@referrerpolicy="origin-when-cross-origin"]')
-            # print(f"Đang trích xuất hình ảnh từ bài đăng: {post_url}, at {taken_at}")
-            for img in image_element:
-                image_url = img.get_attribute("src")
+        if history is not None:
+            known = history.known_posts(post_url.replace(f"@{user}/", "") for post_url, _ in posts)
+            posts = [post for post in posts if post[0].replace(f"@{user}/", "") not in known]
+
+        image_xpath = '//img[@referrerpolicy="origin-when-cross-origin"]'
+
+        def extract_images(media_url, timeout):
+            self._wait_for_element(By.XPATH, image_xpath, timeout)
+            return [img.get_attribute("src") for img in self.driver.find_elements(By.XPATH, image_xpath)]
+
+        pages = self._visit_in_tabs([post_url + "/media" for post_url, _ in posts], extract_images)
+        for (post_url, taken_at), image_urls in zip(posts, pages):
+            for image_url in image_urls or []:
                 if image_url:
-                    results.append((image_url, post_url.replace(f"@{user}/", ""), taken_at))
-                    # print(f"\tĐã trích xuất hình ảnh: {image_url}")
+                    results.append(MediaItem(image_url, post_url.replace(f"@{user}/", ""), taken_at))
 
         return results
-
-    def _extract_info_nodes(self, all_nodes):
-        """Trích xuất các nút hình ảnh từ dữ liệu đã thu thập."""
-        results = []
-        for node in all_nodes:
-            thread_items = node['node'].get('thread_items', [])
-            for item in thread_items:
-                post = item.get('post', {})
-                carousel_media = post.get('carousel_media', [])
-                try:
-                    if not carousel_media:
-                        image_url = post['image_versions2']['candidates'][0]['url']
-                        taken_at = post.get('taken_at')
-                        post_url = f"https://www.threads.net/post/{post['code']}"
-                        results.append((image_url, post_url, taken_at))
-                    else:
-                        for media in carousel_media:
-                            image_url = media['image_versions2']['candidates'][0]['url']
-                            taken_at = post.get('taken_at')
-                            post_url = f"https://www.threads.net/post/{post['code']}"
-                            results.append((image_url, post_url, taken_at))
-                except Exception as e:
-                    pass
-
-        self.driver.execute_script("window.scrollTo(0, 0);")
-        return results
\ No newline at end of file
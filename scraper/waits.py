@@ -0,0 +1,61 @@
+import time
+
+# Script cài MutationObserver để ghi lại thời điểm DOM thay đổi lần cuối.
+MUTATION_OBSERVER_SCRIPT = """
+if (!window.__scraperLastMutation) {
+    window.__scraperLastMutation = Date.now();
+    new MutationObserver(() => { window.__scraperLastMutation = Date.now(); })
+        .observe(document.documentElement, {childList: true, subtree: true, attributes: true});
+}
+return Date.now() - window.__scraperLastMutation;
+"""
+
+# Script cài PerformanceObserver đếm số tài nguyên mạng đã tải xong. Không dùng
+# performance.getEntriesByType('resource') vì bộ đệm resource timing chỉ giữ 250 mục:
+# trên trang cuộn dài, số đếm ngừng tăng dù trình duyệt vẫn đang tải.
+RESOURCE_COUNT_SCRIPT = """
+if (window.__scraperResourceCount === undefined) {
+    window.__scraperResourceCount = 0;
+    new PerformanceObserver((list) => { window.__scraperResourceCount += list.getEntries().length; })
+        .observe({type: 'resource', buffered: true});
+}
+return window.__scraperResourceCount;
+"""
+
+
+def wait_until(condition, timeout, poll=0.05, max_poll=0.5, ignored_exceptions=()):
+    """
+    Gọi condition() cho tới khi nó trả về giá trị truthy hoặc hết thời gian chờ.
+    Khoảng nghỉ giữa các lần kiểm tra tăng dần từ `poll` tới `max_poll`,
+    nên trang nhanh chỉ tốn vài mili giây. Trả về giá trị cuối cùng của condition().
+    """
+    deadline = time.monotonic() + timeout
+    delay = poll
+    while True:
+        try:
+            result = condition()
+        except ignored_exceptions:
+            result = None
+        if result:
+            return result
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return result
+        time.sleep(min(delay, remaining))
+        delay = min(delay * 2, max_poll)
+
+
+def wait_for_stable(read, idle, timeout, poll=0.1):
+    """Chờ cho tới khi giá trị read() không đổi trong `idle` giây. Trả về True nếu ổn định."""
+    deadline = time.monotonic() + timeout
+    last_value = read()
+    last_change = time.monotonic()
+    while time.monotonic() < deadline:
+        time.sleep(poll)
+        value = read()
+        now = time.monotonic()
+        if value != last_value:
+            last_value, last_change = value, now
+        elif now - last_change >= idle:
+            return True
+    return False
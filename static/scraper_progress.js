@@ -3,6 +3,8 @@ document.addEventListener('DOMContentLoaded', () => {
     const form = document.getElementById('scraper-form');
     const platformSelect = document.getElementById('platformSelect');
     const usernameInput = document.getElementById('usernameInput');
+    const apiModeInput = document.getElementById('apiModeInput');
+    const incrementalInput = document.getElementById('incrementalInput');
     const startButton = document.getElementById('start-scrape-btn');
     const progressContainer = document.getElementById('progress-container');
     const profileInfo = document.getElementById('profile-info');
@@ -84,6 +86,29 @@ document.addEventListener('DOMContentLoaded', () => {
         profileInfo.style.display = 'block';
     }
     
+    function formatRate(bytesPerSecond) {
+        const units = ['B/s', 'KB/s', 'MB/s', 'GB/s'];
+        let value = bytesPerSecond || 0;
+        let unit = 0;
+        while (value >= 1024 && unit < units.length - 1) {
+            value /= 1024;
+            unit++;
+        }
+        return `${value.toFixed(unit ? 1 : 0)} ${units[unit]}`;
+    }
+
+    function displayDownloadProgress(data) {
+        const finished = data.completed + data.failed;
+        let text = `${finished}/${data.total} tệp · ${formatRate(data.rate)}`;
+        if (data.file) {
+            text += data.file.error
+                ? ` · lỗi: ${data.file.name}`
+                : ` · ${data.file.name} (${formatRate(data.file.rate)})`;
+        }
+        progressCount.textContent = text;
+        if (data.total) updateProgressBar(80 + 20 * finished / data.total);
+    }
+    
     // === Main Scraper Logic ===
     function handleFormSubmit(e) {
         e.preventDefault();
@@ -103,7 +128,9 @@ document.addEventListener('DOMContentLoaded', () => {
         startButton.innerHTML = `<span class="spinner-border spinner-border-sm"></span> Đang xử lý...`;
         progressContainer.style.display = 'block';
 
-        const url = `/scrape-stream?platform=${platform}&username=${encodeURIComponent(username)}`;
+        let url = `/scrape-stream?platform=${platform}&username=${encodeURIComponent(username)}`;
+        if (apiModeInput && apiModeInput.checked) url += '&mode=api';
+        if (incrementalInput && incrementalInput.checked) url += '&incremental=1';
         eventSource = new EventSource(url);
 
         eventSource.onopen = () => updateStatus('Đã kết nối, đang bắt đầu quá trình...');
@@ -126,12 +153,18 @@ document.addEventListener('DOMContentLoaded', () => {
             case 'status': updateStatus(data.message); break;
             case 'profile': displayProfile(data); updateProgressBar(20); break;
             case 'progress':
+                if (data.phase === 'download') {
+                    displayDownloadProgress(data);
+                    break;
+                }
                 progressCount.textContent = `${data.found} bài đăng`;
                 const currentWidth = parseFloat(progressBar.style.width) || 20;
                 if (currentWidth < 80) updateProgressBar(currentWidth + 2);
                 break;
             case 'done':
                 updateStatus(data.message);
+                // Thời gian từng giai đoạn (đăng nhập, hồ sơ, cuộn, tải xuống...) để chẩn đoán.
+                if (data.timings) console.table(data.timings);
                 updateProgressBar(100, 'bg-success');
                 finish();
                 break;
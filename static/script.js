@@ -6,6 +6,11 @@ const appState = {
     selectedImages: new Set(),
     lastSelectedPath: null,
     isMarqueeActive: false,
+    thumbnailPollTimer: null,
+    sort: 'name',
+    nextCursor: null,
+    isLoadingPage: false,
+    expandedPaths: new Set(),
     marqueeStartX: 0,
     marqueeStartY: 0,
 };
@@ -15,6 +20,8 @@ const DOMElements = {
     treeContainer: document.getElementById('folderTree'),
     gridWrapper: document.getElementById('imageGridWrapper'),
     gridContainer: document.getElementById('imageGrid'),
+    gridSentinel: document.getElementById('imageGridSentinel'),
+    sortSelect: document.getElementById('sortSelect'),
     labelButtonsContainer: document.getElementById('labelButtons'),
     breadcrumbContainer: document.getElementById('breadcrumbContainer'),
     statusMessage: document.getElementById('statusMessage'),
@@ -56,27 +63,58 @@ function renderTree(nodes, parentElement) {
         const isRoot = node.isRoot;
         li.innerHTML = `
             <div class="node-item ${isRoot ? 'fw-bold' : ''}" data-path="${node.path}">
-                <i class="bi ${node.children?.length ? 'bi-folder' : 'bi-folder-fill'} text-warning"></i>
+                <i class="bi ${node.hasChildren ? 'bi-caret-right' : ''} tree-toggle"></i>
+                <i class="bi ${node.hasChildren ? 'bi-folder' : 'bi-folder-fill'} text-warning"></i>
                 <span>${node.name}</span>
             </div>
         `;
-        const childrenUl = document.createElement('ul');
         if (node.children && node.children.length > 0) {
+            const childrenUl = document.createElement('ul');
             renderTree(node.children, childrenUl);
             li.appendChild(childrenUl);
+            setNodeExpanded(li, true);
         }
         parentElement.appendChild(li);
     });
 }
 
-function renderContent({ images, labels, breadcrumbs }) {
-    DOMElements.gridContainer.innerHTML = images.length
-        ? images.map(img => `
-            <div class="image-item" data-path="${img.path}">
+function setNodeExpanded(li, expanded) {
+    li.classList.toggle('collapsed', !expanded);
+    li.querySelector(':scope > .node-item > .tree-toggle')?.classList.toggle('bi-caret-down', expanded);
+}
+
+// Mở/đóng một nút cây; thư mục con chỉ được tải khi mở lần đầu.
+async function toggleTreeNode(li, expand = li.classList.contains('collapsed') || !li.querySelector(':scope > ul')) {
+    const path = li.querySelector(':scope > .node-item').dataset.path;
+    if (!expand) {
+        setNodeExpanded(li, false);
+        appState.expandedPaths.delete(path);
+        return;
+    }
+    if (!li.querySelector(':scope > ul')) {
+        try {
+            const [node] = await api(`/api/tree?path=${encodeURIComponent(path)}&depth=1`);
+            const childrenUl = document.createElement('ul');
+            renderTree(node.children || [], childrenUl);
+            li.appendChild(childrenUl);
+        } catch (e) { return; /* Error handled in `api` */ }
+    }
+    setNodeExpanded(li, true);
+    appState.expandedPaths.add(path);
+}
+
+function renderImageItems(images) {
+    return images.map(img => `
+            <div class="image-item" data-path="${img.path}" data-media="${img.media}">
                 <div class="selection-indicator"><i class="bi bi-check-circle-fill"></i></div>
-                <img src="${img.thumbnail}" alt="${img.name}" loading="lazy">
+                <img src="${img.thumbnail}" alt="${img.name}" loading="lazy"${img.pending ? ' data-pending="1"' : ''}>
                 <div class="filename" title="${img.name}">${img.name}</div>
-            </div>`).join('')
+            </div>`).join('');
+}
+
+function renderContent({ images, labels, breadcrumbs }) {
+    DOMElements.gridContainer.innerHTML = images.length
+        ? renderImageItems(images)
         : '<div class="text-center text-muted p-5">Thư mục trống</div>';
 
     DOMElements.labelButtonsContainer.innerHTML = labels.length
@@ -91,6 +129,30 @@ function renderContent({ images, labels, breadcrumbs }) {
         ${breadcrumbs.map(b => `<li class="breadcrumb-item"><a href="#" data-path="${b.path}">${b.name}</a></li>`).join('')}`;
 }
 
+// Thumbnail đang được tạo ở nền: hỏi lại máy chủ định kỳ và thay placeholder khi sẵn sàng.
+function scheduleThumbnailPoll(delay = 1500) {
+    clearTimeout(appState.thumbnailPollTimer);
+    const pendingImgs = DOMElements.gridContainer.querySelectorAll('img[data-pending]');
+    if (!pendingImgs.length) return;
+    appState.thumbnailPollTimer = setTimeout(async () => {
+        const paths = Array.from(pendingImgs, img => img.closest('.image-item').dataset.path);
+        try {
+            const { thumbnails } = await api('/api/thumbnails', {
+                method: 'POST',
+                body: JSON.stringify({ paths }),
+            });
+            pendingImgs.forEach(img => {
+                const url = thumbnails[img.closest('.image-item').dataset.path];
+                if (url) {
+                    img.src = url;
+                    img.removeAttribute('data-pending');
+                }
+            });
+        } catch (e) { /* Error handled in `api` */ }
+        scheduleThumbnailPoll(Math.min(delay * 1.5, 10000));
+    }, delay);
+}
+
 // --- Main Logic & UI Feedback ---
 function showStatus(message, type = 'success', duration = 3000) {
     const { statusMessage } = DOMElements;
@@ -102,11 +164,51 @@ function showStatus(message, type = 'success', duration = 3000) {
 
 async function loadTree() {
     try {
-        const treeData = await api('/api/tree');
+        const treeData = await api('/api/tree?depth=2');
         renderTree(treeData, DOMElements.treeContainer);
+        // Mở lại các nhánh người dùng đã mở trước đó (cha trước con).
+        const paths = Array.from(appState.expandedPaths).sort((a, b) => a.split('/').length - b.split('/').length);
+        for (const path of paths) {
+            const li = DOMElements.treeContainer.querySelector(`.node-item[data-path="${CSS.escape(path)}"]`)?.parentElement;
+            if (li) await toggleTreeNode(li, true);
+            else appState.expandedPaths.delete(path);
+        }
+        document.querySelector(`#folderTree .node-item[data-path="${CSS.escape(appState.currentPath)}"]`)?.classList.add('active');
     } catch (e) { /* Error handled in `api` */ }
 }
 
+const CONTENT_PAGE_SIZE = 200;
+
+function contentUrl(cursor) {
+    const params = new URLSearchParams({ path: appState.currentPath, sort: appState.sort, limit: CONTENT_PAGE_SIZE });
+    if (cursor) params.set('cursor', cursor);
+    return `/api/content?${params}`;
+}
+
+function sentinelNearViewport() {
+    const sentinel = DOMElements.gridSentinel;
+    return sentinel && sentinel.getBoundingClientRect().top < window.innerHeight + 600;
+}
+
+// Tải trang ảnh tiếp theo khi người dùng cuộn gần cuối lưới.
+async function loadNextPage() {
+    if (!appState.nextCursor || appState.isLoadingPage) return;
+    appState.isLoadingPage = true;
+    const path = appState.currentPath;
+    try {
+        const content = await api(contentUrl(appState.nextCursor));
+        if (path !== appState.currentPath) return;
+        DOMElements.gridContainer.insertAdjacentHTML('beforeend', renderImageItems(content.images));
+        appState.nextCursor = content.nextCursor;
+        updateSelectionUI();
+        scheduleThumbnailPoll();
+    } catch (e) { /* Error handled in `api` */ }
+    finally {
+        appState.isLoadingPage = false;
+    }
+    if (sentinelNearViewport()) loadNextPage();
+}
+
 async function navigateToPath(path) {
     appState.currentPath = path;
     appState.selectedImages.clear();
@@ -117,9 +219,14 @@ async function navigateToPath(path) {
     document.querySelectorAll('#folderTree .node-item.active').forEach(el => el.classList.remove('active'));
     document.querySelector(`#folderTree .node-item[data-path="${path}"]`)?.classList.add('active');
     try {
-        const content = await api(`/api/content?path=${encodeURIComponent(path)}`);
+        appState.nextCursor = null;
+        const content = await api(contentUrl(null));
+        if (path !== appState.currentPath) return;
         renderContent(content);
+        appState.nextCursor = content.nextCursor;
         updateSelectionUI();
+        scheduleThumbnailPoll();
+        if (sentinelNearViewport()) loadNextPage();
     } catch (e) { /* Error handled in `api` */ }
 }
 
@@ -153,7 +260,7 @@ async function assignToLabel(labelPath) {
         let message = `Đã di chuyển ${data.moved} ảnh.`;
         if (data.errors.length > 0) message += `\nLỗi: ${data.errors.join(', ')}`;
         showStatus(message, data.errors.length > 0 ? 'warning' : 'success');
-        await loadTree();
+        // Chỉ ảnh bị di chuyển, cây nhãn không đổi: không cần tải lại cây.
         await navigateToPath(appState.currentPath);
     } catch (e) { /* Error handled in `api` */ }
 }
@@ -249,7 +356,12 @@ function updateSelectionFromMarquee() {
 function setupEventListeners() {
     DOMElements.treeContainer.addEventListener('click', e => {
         const nodeItem = e.target.closest('.node-item');
-        if (nodeItem) navigateToPath(nodeItem.dataset.path);
+        if (!nodeItem) return;
+        if (e.target.closest('.tree-toggle')) {
+            toggleTreeNode(nodeItem.parentElement);
+            return;
+        }
+        navigateToPath(nodeItem.dataset.path);
     });
     DOMElements.breadcrumbContainer.addEventListener('click', e => {
         e.preventDefault();
@@ -267,9 +379,23 @@ function setupEventListeners() {
     DOMElements.reloadTreeBtn.addEventListener('click', loadTree);
     DOMElements.openScraperBtn.addEventListener('click', () => DOMElements.scraperModal.show());
     DOMElements.gridContainer.addEventListener('click', handleImageClick);
+    // Nhấp đúp: mở bản xem trước cỡ lớn (ảnh thu nhỏ được lưu đệm phía máy chủ).
+    DOMElements.gridContainer.addEventListener('dblclick', e => {
+        const item = e.target.closest('.image-item');
+        if (item) window.open(`${item.dataset.media}&w=1200`, '_blank');
+    });
     DOMElements.gridWrapper.addEventListener('mousedown', handleMarqueeStart);
     document.addEventListener('mousemove', handleMarqueeMove);
     document.addEventListener('mouseup', handleMarqueeEnd);
+    if (DOMElements.gridSentinel) {
+        new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadNextPage();
+        }, { rootMargin: '600px' }).observe(DOMElements.gridSentinel);
+    }
+    DOMElements.sortSelect?.addEventListener('change', e => {
+        appState.sort = e.target.value;
+        navigateToPath(appState.currentPath);
+    });
     
     // Listen for the custom event from scraper_progress.js
     document.addEventListener('scrapeComplete', () => {
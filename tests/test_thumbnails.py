@@ -0,0 +1,37 @@
+import os
+import sys
+
+import pytest
+from PIL import Image
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from thumbnails import generate_thumbnail
+
+
+@pytest.mark.parametrize("mode, filename", [
+    ("P", "palette.gif"),
+    ("1", "bilevel.png"),
+    ("I;16", "gray16.png"),
+    ("RGB", "photo.jpg"),
+])
+def test_generate_thumbnail_large_image(tmp_path, mode, filename):
+    # Ảnh lớn hơn khung ít nhất 2 lần nên đi qua nhánh reduce().
+    src = tmp_path / filename
+    Image.new(mode, (1600, 1200)).save(src)
+    dest = tmp_path / "thumb.webp"
+
+    assert generate_thumbnail(str(src), str(dest), (150, 150)) == str(dest)
+    with Image.open(dest) as thumb:
+        assert thumb.width == 150
+        assert thumb.mode in ("RGB", "RGBA")
+
+
+def test_generate_thumbnail_width_only(tmp_path):
+    src = tmp_path / "portrait.gif"
+    Image.new("P", (1000, 2000)).save(src)
+    dest = tmp_path / "variant.webp"
+
+    generate_thumbnail(str(src), str(dest), (600, None))
+    with Image.open(dest) as variant:
+        assert variant.size == (600, 1200)
@@ -0,0 +1,178 @@
+# thumbnails.py (Tạo thumbnail ở tiến trình nền, ngoài luồng xử lý request)
+
+import os
+import glob
+import hashlib
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+THUMBNAIL_EXTENSION = '.webp'
+
+
+def generate_thumbnail(src_path, dest_path, size):
+    """
+    Tạo thumbnail WebP cho một ảnh (chạy trong tiến trình con). `size` là khung (rộng, cao);
+    cao = None nghĩa là chỉ giới hạn chiều rộng, chiều cao theo tỉ lệ ảnh.
+    Dùng draft() để JPEG được giải mã thẳng ở tỉ lệ nhỏ và reduce() cho các định dạng khác,
+    tránh giải mã toàn bộ ảnh gốc ở độ phân giải đầy đủ.
+    """
+    # Import tại đây: chỉ tiến trình con cần Pillow, tiến trình web không phải nạp nó.
+    from PIL import Image
+    with Image.open(src_path) as img:
+        if size[1] is None:
+            size = (size[0], max(1, img.height * size[0] // img.width))
+        img.draft('RGB', size)
+        # Chuyển chế độ trước reduce(): reduce() không hỗ trợ ảnh bảng màu (P), 1-bit hay I;16.
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'PA') else 'RGB')
+        factor = min(img.width // size[0], img.height // size[1])
+        if factor >= 2:
+            img = img.reduce(factor)
+        img.thumbnail(size)
+        tmp_path = dest_path + '.tmp'
+        img.save(tmp_path, 'WEBP', quality=80, method=4)
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+
+class ThumbnailService:
+    """
+    Quản lý thumbnail của CloudStorage: tra cứu không chặn, tạo bằng process pool,
+    và tự vô hiệu hóa thumbnail cũ khi kích thước hoặc mtime của ảnh gốc thay đổi.
+    `url_prefix`: tiền tố URL mà lookup() trả về; không cần nếu chỉ dùng render().
+    `pool`: một ThumbnailService khác để dùng chung process pool (ví dụ cho các kích thước xem trước).
+    """
+    def __init__(self, base_dir, thumb_dir, size, url_prefix=None, workers=None, pool=None):
+        self.base_dir = base_dir
+        self.thumb_dir = thumb_dir
+        self.size = size
+        self.url_prefix = url_prefix.rstrip('/') if url_prefix else None
+        self.workers = workers or max((os.cpu_count() or 2) - 1, 1)
+        self._executor = None
+        self._pool = pool
+        self._pending = {}
+        self._failed = set()
+        self._lock = threading.Lock()
+        os.makedirs(thumb_dir, exist_ok=True)
+
+    @staticmethod
+    def _key(rel_path):
+        return hashlib.sha1(rel_path.replace('\\', '/').encode('utf-8')).hexdigest()[:20]
+
+    def _name(self, rel_path, stat):
+        # Kích thước và mtime của ảnh gốc nằm trong tên tệp: ảnh thay đổi thì tên thay đổi.
+        return f"{self._key(rel_path)}-{stat.st_size:x}-{stat.st_mtime_ns:x}{THUMBNAIL_EXTENSION}"
+
+    def _paths(self, full_path, stat):
+        rel_path = os.path.relpath(full_path, self.base_dir)
+        name = self._name(rel_path, stat or os.stat(full_path))
+        return rel_path, name, os.path.join(self.thumb_dir, name)
+
+    def lookup(self, full_path, stat=None):
+        """
+        Trả về (url, pending): URL nếu thumbnail đã sẵn sàng; nếu chưa, ảnh được đưa vào
+        hàng đợi tạo nền và pending=True. Ảnh không tạo được thumbnail trả về (None, False).
+        """
+        rel_path, name, dest_path = self._paths(full_path, stat)
+        if os.path.exists(dest_path):
+            return f"{self.url_prefix}/{name}", False
+        if dest_path in self._failed:
+            return None, False
+        self._submit(full_path, rel_path, dest_path)
+        return None, True
+
+    def render(self, full_path, stat=None, timeout=None):
+        """
+        Trả về đường dẫn tệp đã thu nhỏ, chờ tối đa `timeout` giây nếu phải tạo mới
+        (việc giải mã vẫn chạy trong process pool). Trả về None nếu ảnh không tạo được.
+        """
+        rel_path, _, dest_path = self._paths(full_path, stat)
+        if os.path.exists(dest_path):
+            return dest_path
+        if dest_path in self._failed:
+            return None
+        future = self._submit(full_path, rel_path, dest_path)
+        try:
+            future.result(timeout)
+        except Exception:
+            # Lỗi đã được ghi nhận trong _on_done; hết thời gian chờ thì lần sau thử lại.
+            return None
+        return dest_path
+
+    def warm(self, folder, accept=None):
+        """Đưa các ảnh chưa có thumbnail trong một thư mục (đệ quy) vào hàng đợi, ví dụ sau khi cào xong."""
+        for root, dirs, files in os.walk(folder):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for filename in files:
+                if accept is not None and not accept(filename):
+                    continue
+                full_path = os.path.join(root, filename)
+                try:
+                    self.lookup(full_path)
+                except OSError:
+                    pass
+
+    def remove(self, rel_path):
+        """Xóa mọi phiên bản thumbnail của một ảnh."""
+        for thumb_path in glob.glob(os.path.join(self.thumb_dir, self._key(rel_path) + '-*')):
+            os.remove(thumb_path)
+
+    def move(self, old_rel_path, new_rel_path):
+        """
+        Đổi khóa thumbnail khi ảnh được đổi chỗ bằng os.rename (mtime và kích thước giữ nguyên,
+        nên thumbnail vẫn hợp lệ và không phải giải mã lại ảnh).
+        """
+        old_prefix = os.path.join(self.thumb_dir, self._key(old_rel_path))
+        new_prefix = os.path.join(self.thumb_dir, self._key(new_rel_path))
+        for thumb_path in glob.glob(old_prefix + '-*'):
+            if thumb_path.endswith('.tmp'):
+                continue
+            try:
+                os.replace(thumb_path, new_prefix + thumb_path[len(old_prefix):])
+            except OSError:
+                pass
+
+    def _get_executor(self):
+        if self._pool is not None:
+            return self._pool._get_executor()
+        with self._lock:
+            if self._executor is None:
+                # spawn: không fork tiến trình Flask đa luồng.
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context('spawn'))
+            return self._executor
+
+    def _submit(self, full_path, rel_path, dest_path):
+        executor = self._get_executor()
+        with self._lock:
+            if dest_path in self._pending:
+                return self._pending[dest_path]
+            future = executor.submit(generate_thumbnail, full_path, dest_path, self.size)
+            self._pending[dest_path] = future
+        future.add_done_callback(lambda f: self._on_done(f, full_path, rel_path, dest_path))
+        return future
+
+    def _on_done(self, future, full_path, rel_path, dest_path):
+        error = None if future.cancelled() else future.exception()
+        with self._lock:
+            self._pending.pop(dest_path, None)
+            if error is not None:
+                self._failed.add(dest_path)
+        if future.cancelled():
+            return
+        if error is not None:
+            print(f"Lỗi tạo thumbnail cho {full_path}: {error}")
+            return
+        # Xóa các phiên bản cũ của cùng ảnh (trước khi ảnh gốc thay đổi).
+        for thumb_path in glob.glob(os.path.join(self.thumb_dir, self._key(rel_path) + '-*')):
+            if thumb_path != dest_path and not thumb_path.endswith('.tmp'):
+                try:
+                    os.remove(thumb_path)
+                except OSError:
+                    pass
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
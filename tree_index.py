@@ -0,0 +1,63 @@
+# tree_index.py (Chỉ mục cây thư mục nhãn cho /api/tree)
+
+import os
+import threading
+
+
+class TreeIndex:
+    """
+    Lưu danh sách thư mục con của từng thư mục đã được xem. Mỗi mục được kiểm tra lại bằng
+    mtime của thư mục, và ứng dụng chỉ cần vô hiệu hóa đúng thư mục nó vừa thay đổi,
+    thay vì dựng lại toàn bộ cây.
+    """
+    def __init__(self, base_dir):
+        self.base_dir = base_dir
+        self._children = {}  # đường dẫn tuyệt đối -> (mtime_ns, [tên thư mục con])
+        self._lock = threading.Lock()
+
+    def children(self, path):
+        """Tên các thư mục con (đã sắp xếp, bỏ thư mục ẩn) của `path`."""
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return []
+        with self._lock:
+            cached = self._children.get(path)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        names = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if not entry.name.startswith('.') and entry.is_dir():
+                        names.append(entry.name)
+        except OSError:
+            return []
+        names.sort()
+        with self._lock:
+            self._children[path] = (mtime_ns, names)
+        return names
+
+    def invalidate(self, *paths, recursive=False):
+        """Bỏ các mục của `paths` (và toàn bộ cây con nếu recursive=True) khỏi chỉ mục."""
+        with self._lock:
+            for path in paths:
+                self._children.pop(path, None)
+                if recursive:
+                    prefix = path.rstrip(os.sep) + os.sep
+                    for key in [key for key in self._children if key.startswith(prefix)]:
+                        del self._children[key]
+
+    def node(self, path, depth=None):
+        """
+        Dựng nút cây cho `path`, mở rộng tối đa `depth` cấp (None = toàn bộ).
+        Nút chưa được mở rộng có 'children': None và 'hasChildren' cho biết có thể mở rộng hay không.
+        """
+        rel_path = os.path.relpath(path, self.base_dir).replace('\\', '/') if path != self.base_dir else ''
+        name = os.path.basename(path) if rel_path else os.path.basename(self.base_dir)
+        child_names = self.children(path)
+        node = {'name': name, 'path': rel_path, 'hasChildren': bool(child_names), 'children': None}
+        if depth is None or depth > 0:
+            next_depth = None if depth is None else depth - 1
+            node['children'] = [self.node(os.path.join(path, child), next_depth) for child in child_names]
+        return node